@@ -0,0 +1,135 @@
+"""
+finsec performance benchmarks.
+
+Runs each stage of fetching and processing 13F filings against a local fixture server serving a synthetic manager (so
+results are repeatable and no requests are made to EDGAR), reporting the time, throughput and peak (Python) memory of:
+    listing       reading the browse-edgar listing
+    amendments    resolving the period of report of each 13F-HR/A
+    fetch         fetching the largest filing's documents (the I/O '_parse_13f_url' does before parsing)
+    parse_<engine>  parsing those (already fetched) documents with each parser engine
+    aggregation   building the simplified holdings table
+    excel         writing every quarter to Excel
+
+Usage:
+    python benchmarks/bench_finsec.py --holdings 50000 --output results.json
+    python benchmarks/bench_finsec.py --baseline results.json     # Exits 1 if any stage regressed beyond --tolerance.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import finsec  # noqa: E402
+from finsec.fixtures import FixtureServer, write_synthetic_manager  # noqa: E402
+from finsec.parsers import _PARSER_ENGINES_, parse_13f_documents, simplify_holdings_table  # noqa: E402
+
+_CIK_ = "0000000001"
+
+
+def _measure(func, repeat:int, rows:int = None):
+    """Times 'func' over 'repeat' runs, then measures its peak memory in one further run (tracemalloc slows the code it
+    traces, so it is kept out of the timed runs)."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    result = {"best_s": min(timings), "mean_s": sum(timings) / len(timings), "peak_mb": peak / 1024 ** 2}
+    if rows:
+        result["rows_per_s"] = rows / result["best_s"]
+    return result
+
+
+def run(holdings:int, quarters:int, repeat:int):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        written = write_synthetic_manager(directory, cik=_CIK_, start_qtr_year=(2021, 1), quarters=quarters, holdings=holdings)
+        latest = written[0]
+        with FixtureServer(directory) as server:
+            transport = server.transport()
+
+            def _filing(**kwargs):
+                return finsec.Filing(_CIK_, transport=transport, **kwargs)
+
+            results["listing"] = _measure(lambda: _filing()._get_last_100_13f_filings_url(), repeat)
+
+            def _amendments():
+                filing = _filing()
+                filing._get_last_100_13f_filings_url()
+                filing._13f_amendment_filings_period_of_filings()
+            results["amendments"] = _measure(_amendments, repeat)
+
+            filing = _filing()
+            date = latest['filed'].isoformat()
+            results["fetch"] = _measure(lambda: filing._fetch_13f_documents(latest['url'], date), repeat)
+
+            # Parsing is timed on documents fetched up front, so it excludes any I/O.
+            primary_document, info_table, primary_html_document = filing._fetch_13f_documents(latest['url'], date)
+            for engine in _PARSER_ENGINES_:
+                results["parse_{}".format(engine)] = _measure(lambda: parse_13f_documents(primary_document, info_table, date, primary_html_document, engine), repeat, holdings)
+
+            holdings_table = parse_13f_documents(primary_document, info_table, date, primary_html_document)[1]
+            results["aggregation"] = _measure(lambda: simplify_holdings_table(holdings_table), repeat, holdings)
+
+            filing = _filing()
+            filing.get_13f_filings("Q1-2021", "Q4-2099")
+            cwd = os.getcwd()
+            os.chdir(directory)
+            try:
+                results["excel"] = _measure(lambda: filing.convert_filings_to_excel(simplified=False, inc_cover_page_tabs=True), repeat, holdings * quarters)
+            finally:
+                os.chdir(cwd)
+    return results
+
+
+def compare(results:dict, baseline:dict, tolerance:float):
+    """Returns the stages whose best time is more than 'tolerance' (fraction) slower than the baseline."""
+    regressions = []
+    for stage, result in results.items():
+        if stage in baseline and result["best_s"] > baseline[stage]["best_s"] * (1 + tolerance):
+            regressions.append((stage, baseline[stage]["best_s"], result["best_s"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="finsec performance benchmarks")
+    parser.add_argument("--holdings", type=int, default=20000, help="information table rows per filing")
+    parser.add_argument("--quarters", type=int, default=4, help="number of quarterly filings")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage (best is reported)")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of a previous run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline (fraction)")
+    args = parser.parse_args(argv)
+
+    results = run(args.holdings, args.quarters, args.repeat)
+    print("{:<14}{:>10}{:>10}{:>14}{:>10}".format("stage", "best s", "mean s", "rows/s", "peak MB"))
+    for stage, result in results.items():
+        rows_per_s = "{:,.0f}".format(result["rows_per_s"]) if "rows_per_s" in result else "-"
+        print("{:<14}{:>10.4f}{:>10.4f}{:>14}{:>10.1f}".format(stage, result["best_s"], result["mean_s"], rows_per_s, result["peak_mb"]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"version": finsec.__version__, "holdings": args.holdings, "quarters": args.quarters, "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for stage, before, after in regressions:
+            print("REGRESSION {}: {:.4f}s -> {:.4f}s".format(stage, before, after))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
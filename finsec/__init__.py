@@ -1,9 +1,43 @@
 # 13f_py - 
 
 from . import version
-from .filing import Filing
 
 __version__ = version.version
 __author__ = "Stephen Hogg"
 
-__all__ = ['filing']
+__all__ = ['filing', 'FilingBatch', 'FilingPipeline','FilingWatcher', 'Transport', 'RateLimiter', 'DocumentCache', 'CacheMissError', 'FilingStore', 'HoldingsIndex', 'HoldingsHistory', 'BulkDataset', 'Holdings', 'add_listener', 'remove_listener', 'MetricsCollector', 'LogListener']
+
+# Public name -> defining module. Modules are only imported when one of their names is first used (PEP 562), so
+# 'import finsec' does not load requests, pandas, bs4 or openpyxl.
+_LAZY_ATTRIBUTES_ = {
+    'Filing': 'filing',
+    'FilingBatch': 'batch',
+    'FilingPipeline': 'pipeline',
+    'Transport': 'transport',
+    'RateLimiter': 'transport',
+    'DocumentCache': 'cache',
+    'CacheMissError': 'cache',
+    'FilingStore': 'store',
+    'HoldingsIndex': 'index',
+    'HoldingsHistory': 'history',
+    'FilingWatcher': 'watch',
+    'BulkDataset': 'bulk',
+    'Holdings': 'parsers',
+    'add_listener': 'metrics',
+    'remove_listener': 'metrics',
+    'MetricsCollector': 'metrics',
+    'LogListener': 'metrics',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES_:
+        import importlib
+        value = getattr(importlib.import_module('.' + _LAZY_ATTRIBUTES_[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES_))
@@ -1,30 +1,89 @@
-import requests
-from bs4 import BeautifulSoup as bs
+from __future__ import annotations
+
 from datetime import datetime
-import pandas as pd
-import pdb
 import os
-import time
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
 
+from .parsers import needs_primary_html, parse_13f_documents, split_submission_text, validate_parser
+from .transport import get_default_transport
+from .cache import CacheMissError
+from .store import FilingStore
+from .changes import compare_holdings
+from .export import write_csv, write_excel, write_parquet
+from . import metrics
+from .lazy import LazyModule
+
+bs4 = LazyModule("bs4")
+pd = LazyModule("pandas")
+
 _BASE_URL_ = 'https://www.sec.gov'
 _13F_SEARCH_URL_ = 'https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&CIK={}&type=13F-HR&count=100'
+_SUBMISSIONS_URL_ = 'https://data.sec.gov/submissions/{}'
+_FILING_INDEX_URL_ = '/Archives/edgar/data/{}/{}/{}-index.htm'
+_13F_FORMS_ = ("13F-HR", "13F-HR/A")
+_FETCH_MODES_ = ('index', 'txt')
+_LISTING_TTL_ = 15 * 60    # Seconds a cached browse-edgar listing is reused for, filing documents themselves never expire.
+_MAX_WORKERS_ = 8     # Threads used to fetch filing pages concurrently, requests are still throttled by the transport.
 _REQ_HEADERS_ = {
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.99 Safari/537.36',
-                    'Accept-Encoding': 'gzip, deflate, br',
-                    'HOST': 'www.sec.gov',
                 }
 
+def _filing_qtr_years(filing_dates):
+    """Vectorized 'FilingBase._recent_qtr_year', the calendar quarter reported on is the quarter before the filing date."""
+    dates = pd.to_datetime(pd.Series(filing_dates, dtype=object), format='%Y-%m-%d')
+    quarters = dates.dt.year * 4 + (dates.dt.month - 1) // 3 - 1
+    return ("Q" + (quarters % 4 + 1).astype(str) + "-" + (quarters // 4).astype(str)).tolist()
+
+
+def _period_qtr_years(periods_of_report):
+    """Vectorized 'FilingBase._qtr_year', converts period of report dates to Quarter Year strings."""
+    dates = pd.to_datetime(pd.Series(periods_of_report, dtype=object), format='%Y-%m-%d')
+    return ("Q" + (dates.dt.month // 3).astype(str) + "-" + dates.dt.year.astype(str)).tolist()
+
+
+def merge_amendment(cover_page:dict, holdings_table:pd.DataFrame, simplified_holdings_table:pd.DataFrame, a_cover_page:dict, a_holdings_table:pd.DataFrame, a_simplified_holdings_table:pd.DataFrame):
+    """Applies a single 13F-HR/A amendment to a filing. A "NEW HOLDINGS" amendment adds its holdings (and value) to the filing, any other amendment type restates the entirety of the filing."""
+    if a_cover_page["amendment_type"] == "NEW HOLDINGS":
+        output_cover_page = dict(cover_page)
+        output_cover_page['portfolio_value'] = cover_page['portfolio_value'] + a_cover_page['portfolio_value']
+        output_cover_page['count_holdings'] = cover_page['count_holdings'] + a_cover_page['count_holdings']
+        output_holdings_table = pd.concat([holdings_table,a_holdings_table],ignore_index=True)
+        output_simplified_holdings_table = pd.concat([simplified_holdings_table,a_simplified_holdings_table], ignore_index=True)
+    else:   # If it is a not a "New Holdings" filing type, simply overwrite the entirety of the previous filing. 
+        output_cover_page = dict(a_cover_page)
+        output_holdings_table = a_holdings_table
+        output_simplified_holdings_table = a_simplified_holdings_table
+    output_cover_page['filing_amended'] = True
+    return output_cover_page, output_holdings_table, output_simplified_holdings_table
+
+
 class FilingBase():
-    def __init__(self, cik, declared_user=None):
+    def __init__(self, cik, declared_user=None, parser:str = 'lxml', transport=None, cache=None, fetch_mode:str = 'index', history=None):
+        self._headers = dict(_REQ_HEADERS_)
         if declared_user is not None:
-            _REQ_HEADERS_["User-Agent"] = declared_user+";"+_REQ_HEADERS_["User-Agent"]
+            self._headers["User-Agent"] = declared_user+";"+self._headers["User-Agent"]
+        self._transport = transport if transport is not None else get_default_transport()    # Shared, rate limited connection pool by default.
+        self._cache = cache     # Optional 'DocumentCache', documents are always fetched from EDGAR if not provided.
+        self._history = history     # Optional 'HoldingsHistory', every filing fetched is appended to it.
         self.cik = self._validate_cik(cik)
+        self.parser = validate_parser(parser)     # Information table parser engine, 'lxml' (streaming) or 'bs4'.
+        self.fetch_mode = self._validate_fetch_mode(fetch_mode)     # 'index' (index page, then each document) or 'txt' (complete submission text file, one request).
         self.manager = None
         self._13f_filings = None
         self._13f_amendment_filings = None
+        self._amendment_lock = threading.Lock()
+        self._13f_filing_index = {}     # Quarter Year -> (url, filing date) of the original 13F-HR, see '_13f_index'.
+        self._13f_amendment_chains = {}     # Quarter Year -> [(url, filing date), ...] of its 13F-HR/A filings, oldest first.
+        self._latest_13f_qtr_year = None
+        self._indexed_13f_filings = None    # The listing frames the indexes above were built from.
+        self._indexed_13f_amendment_filings = None
+        self._full_13f_listing = False     # True once the complete filing history has been read (rather than the last 100 filings).
         
-        self.filings = {}
+        self.filings = FilingStore()
+        self.errors = {}    # Quarter Year -> Exception raised fetching that quarter by the most recent 'get_13f_filings'.
 
     def _validate_cik(self, cik:str):
         """Check if CIK is 10 digit string."""
@@ -32,15 +91,36 @@ class FilingBase():
             raise Exception("""Invalid CIK Provided""")
         return cik
 
+    def _validate_fetch_mode(self, fetch_mode:str):
+        """Check the requested filing fetch mode is supported."""
+        if fetch_mode not in _FETCH_MODES_:
+            raise Exception("Invalid fetch mode provided, expected one of {}".format(", ".join(_FETCH_MODES_)))
+        return fetch_mode
+
+    def _fetch(self, url:str, ttl:float = None):
+        """Fetches a url through the document cache (if any) and the transport, returns the response body (bytes)."""
+        if self._cache is not None:
+            content = self._cache.get(url, ttl)
+            metrics.emit('cache', url=url, hit=content is not None)
+            if content is not None:
+                return content
+            if self._cache.offline:
+                raise CacheMissError("Document not available in offline cache: {}".format(url))
+        content = self._transport.get(url, headers=self._headers).content
+        if self._cache is not None:
+            self._cache.put(url, content)
+        return content
+
     def _get_last_100_13f_filings_url(self):
         """Searches the last 13F-HR and 13F-HR/A filings. Returns a 13f_filings variable and 13f_amendment_filings variable"""
         if self._13f_filings is not None or self._13f_amendment_filings is not None:
             return
 
-        webpage = requests.get(_13F_SEARCH_URL_.format(self.cik),headers=_REQ_HEADERS_)
-        soup = bs(webpage.text,"html.parser")
-        results_table = soup.find(lambda table: table.has_attr('summary') and table['summary']=="Results")
-        results_table_df = pd.read_html(StringIO(str(results_table)))[0]
+        webpage = self._fetch(_13F_SEARCH_URL_.format(self.cik), ttl=_LISTING_TTL_)
+        with metrics.stage('parse_listing'):
+            soup = bs4.BeautifulSoup(webpage,"html.parser")
+            results_table = soup.find(lambda table: table.has_attr('summary') and table['summary']=="Results")
+            results_table_df = pd.read_html(StringIO(str(results_table)))[0]
         
         url_endings = []
         url_link_col = results_table_df.columns.get_loc("Format")
@@ -56,27 +136,117 @@ class FilingBase():
         self._13f_amendment_filings = results_table_df[results_table_df['Filings']=="13F-HR/A"].reset_index(drop=True)
 
         return self._13f_filings, self._13f_amendment_filings
-    
-    def _13f_amendment_filings_period_of_filings(self):
-        """This function finds the actual 'period of report' for the 13f amendment filings (this function needs to open the filing url for each and every 13f amendment identified). This is required to understand which particular report is being amended."""
-        def _pandas_apply_func(x):
-            webpage = requests.get(_BASE_URL_ + x['url'],headers=_REQ_HEADERS_)
-            soup = bs(webpage.text,"html.parser")
-            period_of_report_div = soup.find('div', text='Period of Report')
-            period_of_report_date = period_of_report_div.find_next_sibling('div', class_='info').text
-            datetime_obj = datetime.strptime(period_of_report_date, '%Y-%m-%d')
-            release_qtr = datetime_obj.month//3
-            year = datetime_obj.year
-            time.sleep(0.2)
-            return pd.Series([period_of_report_date, "Q{}-{}".format(release_qtr, year)]) 
-        self._13f_amendment_filings[['Period of Report','Period of Report Quarter Year']]  = self._13f_amendment_filings.apply(_pandas_apply_func,axis=1)
-        return self._13f_amendment_filings       
 
-    def _get_bs4_text(self, bs4_obj):
+    def _get_all_13f_filings_url(self):
+        """Reads the complete 13F-HR and 13F-HR/A filing history from EDGAR's structured submissions feed (paging through every submissions file), rather than the 100 most recent filings shown on the browse-edgar results page. Replaces the 13f_filings and 13f_amendment_filings variables."""
+        if self._full_13f_listing:
+            return self._13f_filings, self._13f_amendment_filings
+
+        submissions = json.loads(self._fetch(_SUBMISSIONS_URL_.format("CIK{}.json".format(self.cik)), ttl=_LISTING_TTL_))
+        pages = [submissions['filings']['recent']]
+        for each_file in submissions['filings'].get('files', []):
+            pages.append(json.loads(self._fetch(_SUBMISSIONS_URL_.format(each_file['name']), ttl=_LISTING_TTL_)))
+
+        return self._set_13f_listing(pages, complete=True)
+
+    def _set_13f_listing(self, pages:list, complete:bool):
+        """Replaces the 13f_filings and 13f_amendment_filings variables with the 13F-HR and 13F-HR/A filings in submissions feed pages. 'complete' if the pages hold the full filing history."""
+        cik_int = int(self.cik)
+        rows = []
+        for page in pages:
+            for accession, filing_date, report_date, form in zip(page['accessionNumber'], page['filingDate'], page['reportDate'], page['form']):
+                if form in _13F_FORMS_:
+                    rows.append({"Filings":form, "Filing Date":filing_date, "Accession Number":accession, "Period of Report":report_date or None,
+                                 "url":_FILING_INDEX_URL_.format(cik_int, accession.replace('-', ''), accession)})
+        results_df = pd.DataFrame(rows, columns=["Filings", "Filing Date", "Accession Number", "Period of Report", "url"])
+        results_df = results_df.drop_duplicates("Accession Number").sort_values("Filing Date", ascending=False, kind="stable")   # Newest first, as per browse-edgar.
+
+        with self._amendment_lock:
+            self._13f_filings = results_df[results_df['Filings']=="13F-HR"].reset_index(drop=True)
+            self._13f_amendment_filings = results_df[results_df['Filings']=="13F-HR/A"].reset_index(drop=True)
+            self._full_13f_listing = complete
+        return self._13f_filings, self._13f_amendment_filings
+
+    def _qtr_year_key(self, qtr_year:str):
+        """Converts a Quarter Year string (e.g. 'Q2-2022') to a sortable (year, quarter) tuple."""
         try:
-            return bs4_obj.text
-        except:
-            return "N/A"
+            qtr, year = qtr_year.upper().split("-")
+            key = (int(year), int(qtr.lstrip("Q")))
+        except (AttributeError, ValueError):
+            key = None
+        if key is None or not 1 <= key[1] <= 4:
+            raise Exception("Invalid quarter provided, expected the format 'Q2-2022'")
+        return key
+    
+    def _amendment_period_of_report(self, url:str):
+        """Opens a 13F-HR/A filing index page and returns its 'period of report' date string. Results are kept in the document cache's persistent index (if any) so the page is only ever read once."""
+        if self._cache is not None:
+            period_of_report_date = self._cache.get_value('period_of_report', url)
+            if period_of_report_date is not None:
+                return period_of_report_date
+        webpage = self._fetch(_BASE_URL_ + url)
+        soup = bs4.BeautifulSoup(webpage,"html.parser")
+        period_of_report_div = soup.find('div', text='Period of Report')
+        period_of_report_date = period_of_report_div.find_next_sibling('div', class_='info').text
+        if self._cache is not None:
+            self._cache.set_value('period_of_report', url, period_of_report_date)
+        return period_of_report_date
+
+    def _13f_amendment_filings_period_of_filings(self):
+        """This function finds the actual 'period of report' for the 13f amendment filings (this function needs to open the filing url for each and every 13f amendment identified). This is required to understand which particular report is being amended.
+        The result is computed once per instance, with the filing pages fetched concurrently (subject to the transport's rate limit)."""
+        with self._amendment_lock:
+            if 'Period of Report Quarter Year' in self._13f_amendment_filings.columns:
+                return self._13f_amendment_filings
+            if 'Period of Report' not in self._13f_amendment_filings.columns:
+                self._13f_amendment_filings['Period of Report'] = None
+            periods_of_report = self._13f_amendment_filings['Period of Report'].tolist()  # Already known when read from the submissions feed.
+            unknown = [i for i, x in enumerate(periods_of_report) if not x]
+            with metrics.stage('amendment_periods', count=len(unknown)), ThreadPoolExecutor(max_workers=_MAX_WORKERS_) as executor:
+                for i, period_of_report in zip(unknown, executor.map(self._amendment_period_of_report, self._13f_amendment_filings['url'].iloc[unknown])):
+                    periods_of_report[i] = period_of_report
+            self._13f_amendment_filings['Period of Report'] = periods_of_report
+            self._13f_amendment_filings['Period of Report Quarter Year'] = _period_qtr_years(periods_of_report)
+        return self._13f_amendment_filings
+
+    def _13f_index(self):
+        """Returns the quarter keyed index of the 13F-HR listing, {Quarter Year: (url, filing date)}. Each calendar quarter maps to its original (earliest filed) 13F-HR.
+        Filings are keyed on their period of report where the listing gives it (the submissions feed). The browse-edgar listing does not, so there the quarter before the filing date is assumed,
+        with the most recent filing taken as the latest quarter's filing (a late report for an earlier quarter may share its filing date quarter).
+        The index is built once per listing with vectorized date conversion and also records the quarter of the latest 13F-HR."""
+        filings = self._13f_filings
+        if self._indexed_13f_filings is not filings:
+            qtr_years = _filing_qtr_years(filings['Filing Date'])
+            periods = filings['Period of Report'].tolist() if 'Period of Report' in filings.columns else []
+            known = [i for i, x in enumerate(periods) if x]
+            for i, qtr_year in zip(known, _period_qtr_years([periods[i] for i in known])):
+                qtr_years[i] = qtr_year
+            index = {}
+            for qtr_year, url, filing_date in zip(reversed(qtr_years), reversed(filings['url'].tolist()), reversed(filings['Filing Date'].tolist())):   # Oldest first, the listing is newest first.
+                index.setdefault(qtr_year, (url, filing_date))
+            if len(known) > 0:
+                latest_qtr_year = max(qtr_years, key=self._qtr_year_key)
+            elif len(qtr_years) > 0:
+                latest_qtr_year = qtr_years[0]
+                index[latest_qtr_year] = (filings['url'][0], filings['Filing Date'][0])
+            else:
+                latest_qtr_year = None
+            self._13f_filing_index = index
+            self._latest_13f_qtr_year = latest_qtr_year
+            self._indexed_13f_filings = filings
+        return self._13f_filing_index
+
+    def _13f_amendment_chains_index(self):
+        """Returns {Quarter Year: [(url, filing date), ...]}, the 13F-HR/A filings amending each calendar quarter in the order they were filed. Built once per listing."""
+        amendments = self._13f_amendment_filings_period_of_filings()
+        with self._amendment_lock:
+            if self._indexed_13f_amendment_filings is not amendments:
+                chains = {}
+                for qtr_year, url, filing_date in zip(reversed(amendments['Period of Report Quarter Year'].tolist()), reversed(amendments['url'].tolist()), reversed(amendments['Filing Date'].tolist())):
+                    chains.setdefault(qtr_year, []).append((url, filing_date))
+                self._13f_amendment_chains = chains
+                self._indexed_13f_amendment_filings = amendments
+        return self._13f_amendment_chains
 
     def _recent_qtr_year(self, datetime_o:str):
         """Function estimates 'period of report' in a Quarter Year format (calendar year) based upon filing date."""
@@ -97,98 +267,68 @@ class FilingBase():
         year = datetime_obj.year
         return "Q{}-{}".format(release_qtr, year)
 
-    def _parse_13f_url(self, url:str, date:str):
-        response = requests.get(_BASE_URL_+url, headers=_REQ_HEADERS_)
-        soup = bs(response.text, "html.parser")
-        import re
-        url_primary_html_document = soup.find_all('a', attrs = {'href': re.compile('xml')})[0]['href']  # Html primary doc is 1st int the list, this contains the detail on whether the dollars listed are nearest dollar or thousand dollar.
-        url_primary_document = soup.find_all('a', attrs = {'href': re.compile('xml')})[1]['href'] # XML Primary doc is always 2nd in the list.
-        url_list_document = soup.find_all('a', attrs = {'href': re.compile('xml')})[3]['href'] # xml list is always 4th in the list.
-
-        response = requests.get(_BASE_URL_+url_primary_html_document, headers=_REQ_HEADERS_)
-        primary_html_doc = bs(response.text, "xml")
-
-        response = requests.get(_BASE_URL_+url_primary_document, headers=_REQ_HEADERS_)
-        primary_doc = bs(response.text, "xml")
+    def _index_documents(self, url:str):
+        """Reads a filing index page. Returns the (href, type) of each document in its 'Document Format Files' table."""
+        soup = bs4.BeautifulSoup(self._fetch(_BASE_URL_+url), "html.parser")
+        table = soup.find('table', attrs={'summary': 'Document Format Files'})
+        documents = []
+        for row in table.find_all('tr'):
+            cells = row.find_all('td')
+            link = row.find('a', href=True)
+            if len(cells) >= 4 and link is not None:
+                documents.append((link['href'], cells[3].get_text(strip=True)))
+        return documents
+
+    def _fetch_13f_documents_index(self, url:str, date:str):
+        """Fetches a filing's primary document, information table and (2023 filings only) rendered primary document via its index page. Documents are identified by their type rather than their position on the page."""
+        primary_html_url = primary_url = info_table_url = None
+        for href, doc_type in self._index_documents(url):
+            if not href.lower().endswith('.xml'):
+                continue
+            rendered = '/xsl' in href.lower()     # Rendered (html) versions are served from an 'xslForm13F_...' folder.
+            if doc_type in _13F_FORMS_:
+                if rendered and primary_html_url is None:
+                    primary_html_url = href
+                elif not rendered and primary_url is None:
+                    primary_url = href
+            elif doc_type == "INFORMATION TABLE" and not rendered and info_table_url is None:
+                info_table_url = href
+        if primary_url is None or info_table_url is None:
+            raise Exception("Could not locate the primary document and information table of {}".format(url))
+
+        primary_html_document = None
+        if primary_html_url is not None and needs_primary_html(date):
+            primary_html_document = self._fetch(_BASE_URL_+primary_html_url)
+        return self._fetch(_BASE_URL_+primary_url), self._fetch(_BASE_URL_+info_table_url), primary_html_document
+
+    def _fetch_13f_documents_txt(self, url:str, date:str):
+        """Fetches a filing's primary document and information table in a single request by splitting its complete submission text file (<accession>.txt) locally. The rendered primary document is not part of the submission, so it is still read via the index page for 2023 filings."""
+        primary_document = info_table = None
+        for doc_type, filename, document in split_submission_text(self._fetch(_BASE_URL_+url.replace('-index.htm', '.txt'))):
+            if doc_type in _13F_FORMS_ and primary_document is None:
+                primary_document = document
+            elif doc_type == "INFORMATION TABLE" and info_table is None:
+                info_table = document
+        if primary_document is None or info_table is None:
+            raise Exception("Could not locate the primary document and information table of {}".format(url))
+
+        primary_html_document = None
+        if needs_primary_html(date):
+            for href, doc_type in self._index_documents(url):
+                if doc_type in _13F_FORMS_ and '/xsl' in href.lower():
+                    primary_html_document = self._fetch(_BASE_URL_+href)
+                    break
+        return primary_document, info_table, primary_html_document
+
+    def _fetch_13f_documents(self, url:str, date:str):
+        """Fetches the documents of a single 13F filing with the instance's fetch mode. Returns the primary document, information table and rendered primary document (or None)."""
+        if self.fetch_mode == 'txt':
+            return self._fetch_13f_documents_txt(url, date)
+        return self._fetch_13f_documents_index(url, date)
 
-        response = requests.get(_BASE_URL_ + url_list_document, headers=_REQ_HEADERS_)
-        list_doc = bs(response.text, "xml")
-
-        # Check if the documentation is to the nearest dollar or thousand dollars. This new reporting rule came into effect in 2023 (reference: https://www.sec.gov/info/edgar/specifications/form13fxmltechspec)
-        datetime_obj = datetime.strptime(date, '%Y-%m-%d')
-        if datetime_obj.year < 2023:
-            dollar_value_multiplier = 1000
-        elif datetime_obj.year > 2023:
-            dollar_value_multiplier = 1
-        else:
-            temp_list = primary_html_doc.findAll(text=re.compile('nearest dollar'))
-            if len(temp_list)>0:
-                dollar_value_multiplier = 1
-            else:
-                dollar_value_multiplier = 1000
-
-        # Get primary doc detail
-        filing_manager = self._get_bs4_text(primary_doc.find("filingManager").find("name"))
-        business_address = self._get_bs4_text(primary_doc.find("street1")) + ", " + self._get_bs4_text(primary_doc.find("city")) + ", " + self._get_bs4_text(primary_doc.find("stateOrCountry")) + ", " + self._get_bs4_text(primary_doc.find("zipCode"))
-        submission_type = self._get_bs4_text(primary_doc.find("submissionType"))
-        period_of_report = self._get_bs4_text(primary_doc.find("periodOfReport"))
-
-        if self._get_bs4_text(primary_doc.find("amendmentInfo")) != 'N/A':  # Check if it is an amendment type filing.
-            amendment_type = self._get_bs4_text(primary_doc.find("amendmentInfo").find("amendmentType"))
-        else:
-            amendment_type = 'N/A'
-
-        signature_name = self._get_bs4_text(primary_doc.find("signatureBlock").find("name"))
-        signature_title = self._get_bs4_text(primary_doc.find("signatureBlock").find("title"))
-        signature_phone = self._get_bs4_text(primary_doc.find("signatureBlock").find("phone"))
-        signature_city = self._get_bs4_text(primary_doc.find("signatureBlock").find("city"))
-        signature_state = self._get_bs4_text(primary_doc.find("signatureBlock").find("stateOrCountry"))
-        signature_date = self._get_bs4_text(primary_doc.find("signatureBlock").find("signatureDate"))
-
-        portfolio_value = int(self._get_bs4_text(primary_doc.find("summaryPage").find("tableValueTotal"))) * dollar_value_multiplier
-        count_holdings = int(self._get_bs4_text(primary_doc.find("summaryPage").find("tableEntryTotal")))
-
-        filing_cover_page = {
-            "filing_manager":filing_manager, 
-            "business_address":business_address, 
-            "submission_type":submission_type, 
-            "period_of_report":period_of_report, 
-            "signature_name":signature_name, 
-            "signature_title":signature_title, 
-            "signature_phone":signature_phone, 
-            "signature_city":signature_city, 
-            "signature_state":signature_state, 
-            "signature_date":signature_date, 
-            "amendment_type":amendment_type,
-            "portfolio_value":portfolio_value, 
-            "count_holdings":count_holdings, 
-            "filing_amended":False                  # Used to record if this instance of the filing has been amended in any way. 
-        }
-
-        # Get list doc detail
-        list_of_holdings = list_doc.findAll("infoTable")
-        result = []
-        for each_holding in list_of_holdings:
-            name_of_issuer = self._get_bs4_text(each_holding.find("nameOfIssuer"))
-            title_of_class = self._get_bs4_text(each_holding.find("titleOfClass"))
-            cusip = self._get_bs4_text(each_holding.find("cusip"))
-            holding_value = int(each_holding.find("value").text) * dollar_value_multiplier
-            share_or_principal_amount = self._get_bs4_text(each_holding.find("shrsOrPrnAmt").find("sshPrnamtType"))
-            share_or_principal_amount_count = int(each_holding.find("shrsOrPrnAmt").find("sshPrnamt").text)
-            # put_or_call = each_holding.find("SOMETHING").text
-            investment_discretion = self._get_bs4_text(each_holding.find("investmentDiscretion"))
-            other_manager = self._get_bs4_text(each_holding.find("otherManager"))
-            voting_authority_share_or_principal_amount_count_sole = int(each_holding.find("votingAuthority").find("Sole").text)
-            voting_authority_share_or_principal_amount_count_shared = int(each_holding.find("votingAuthority").find("Shared").text)
-            voting_authority_share_or_principal_amount_count_none = int(each_holding.find("votingAuthority").find("None").text)
-
-            result.append({"Name of issuer":name_of_issuer, "Title of class":title_of_class, "CUSIP":cusip,"Holding value":holding_value,"Share or principal type":share_or_principal_amount,"Share or principal amount count":share_or_principal_amount_count,"Put or call":None, "Investment discretion":investment_discretion, "Other manager":other_manager, "Voting authority sole count":voting_authority_share_or_principal_amount_count_sole, "Voting authority shared count":voting_authority_share_or_principal_amount_count_shared, "Voting authority none count":voting_authority_share_or_principal_amount_count_none})
-        
-        holdings_table = pd.DataFrame.from_dict(result)
-
-        simplified_columns = ['Name of issuer', 'Title of class', 'CUSIP', 'Share or principal type', 'Put or call','Holding value', 'Share or principal amount count']
-        holdings_table_dropped_na = holdings_table[simplified_columns].dropna(axis=1)
-        simplified_holdings_table = holdings_table_dropped_na.groupby(holdings_table_dropped_na.columns[:-2].to_list(), sort=False,as_index=False).sum()
+    def _parse_13f_url(self, url:str, date:str):
+        primary_document, info_table, primary_html_document = self._fetch_13f_documents(url, date)
+        filing_cover_page, holdings_table, simplified_holdings_table = parse_13f_documents(primary_document, info_table, date, primary_html_document, self.parser)
 
         if self.manager == None:
             self.manager = filing_cover_page.get('filing_manager')
@@ -196,8 +336,7 @@ class FilingBase():
         return filing_cover_page, holdings_table, simplified_holdings_table
 
     def _apply_amendments(self, qtr_year_str:str, original_cover_page:dict, original_holdings_table:pd.DataFrame, original_simplified_holdings_table: pd.DataFrame):
-        self._13f_amendment_filings_period_of_filings()
-        select_amendment_filings = self._13f_amendment_filings[self._13f_amendment_filings['Period of Report Quarter Year'] == qtr_year_str].iloc[::-1]    # Check for matching amendments and reverse the order of the list so amendments can be made chronologically. 
+        select_amendment_filings = self._13f_amendment_chains_index().get(qtr_year_str, [])    # Matching amendments, in the order they were filed so amendments can be made chronologically.
         
         # Start by setting the output variables, this ensures that if no amendment filings are found, these can be returned as is, unaltered.
         output_cover_page = original_cover_page    # Set as original cover page to begin with
@@ -205,48 +344,38 @@ class FilingBase():
         output_simplified_holdings_table = original_simplified_holdings_table
         
         if len(select_amendment_filings) > 0:
-            for index, row in select_amendment_filings.iterrows():
-                a_cover_page, a_holdings_table, a_simplified_holdings_table = self._parse_13f_url(row['url'], row['Filing Date'])
-                if a_cover_page["amendment_type"] == "NEW HOLDINGS":
-
-                    output_cover_page['portfolio_value'] = original_cover_page['portfolio_value'] + a_cover_page['portfolio_value']
-                    output_cover_page['count_holdings'] = original_cover_page['count_holdings'] + a_cover_page['count_holdings']
-
-                    # original_holdings_table = original_holdings_table.append(a_holdings_table, ignore_index=True)
-                    output_holdings_table = pd.concat([original_holdings_table,a_holdings_table],ignore_index=True)
-                    # original_simplified_holdings_table = original_simplified_holdings_table.append(a_simplified_holdings_table, ignore_index=True)
-                    output_simplified_holdings_table = pd.concat([original_simplified_holdings_table,a_simplified_holdings_table], ignore_index=True)
-                    output_cover_page['filing_amended'] = True
-                else:   # If it is a not a "New Holdings" filing type, simply overwrite the entirety of the previous filing. 
-                    output_cover_page = a_cover_page
-                    output_holdings_table = a_holdings_table
-                    output_simplified_holdings_table = a_simplified_holdings_table
-                    output_cover_page['filing_amended'] = True
+            with metrics.stage('apply_amendments', qtr_year=qtr_year_str, count=len(select_amendment_filings)):
+                for url, filing_date in select_amendment_filings:
+                    a_cover_page, a_holdings_table, a_simplified_holdings_table = self._parse_13f_url(url, filing_date)
+                    output_cover_page, output_holdings_table, output_simplified_holdings_table = merge_amendment(output_cover_page, output_holdings_table, output_simplified_holdings_table, a_cover_page, a_holdings_table, a_simplified_holdings_table)
         return output_cover_page, output_holdings_table, output_simplified_holdings_table
 
     def convert_filings_to_excel(self, simplified:bool = True, inc_cover_page_tabs:bool = False):
         """Outputs existing 'self.filings' dictionary to excel. Note that this will overwrite any existing files that may be present."""
-        table_type = "Simplified Holdings Table" if simplified == True else "Holdings Table"
         if len(self.filings)>0:
             if os.path.exists('{}.xlsx'.format(self.cik)):
                 os.remove('{}.xlsx'.format(self.cik))
-            with pd.ExcelWriter('{}.xlsx'.format(self.cik)) as writer: 
-                for qtr_year in self.filings:
-                    if inc_cover_page_tabs == True:
-                        pd.DataFrame.from_dict(self.filings[qtr_year]['Cover Page'],orient='index').to_excel(writer,sheet_name="{}_cover_pg".format(qtr_year))
-                    pd.read_json(self.filings[qtr_year][table_type]).to_excel(writer,sheet_name="{}_holdings".format(qtr_year))
+            write_excel(self.filings, '{}.xlsx'.format(self.cik), simplified, inc_cover_page_tabs)     # Streamed, rows are not held in memory as cells.
         return        
 
+    def convert_filings_to_csv(self, root:str, simplified:bool = True):
+        """Outputs existing 'self.filings' to a CSV file per quarter, partitioned as '<root>/cik=<cik>/quarter=<qtr_year>/part-0.csv'."""
+        return write_csv(self, root, simplified)
+
+    def convert_filings_to_parquet(self, root:str, simplified:bool = True):
+        """Outputs existing 'self.filings' to a Parquet file per quarter, partitioned as '<root>/cik=<cik>/quarter=<qtr_year>/part-0.parquet'. Requires pyarrow."""
+        return write_parquet(self, root, simplified)
+
     def get_latest_13f_filing(self, simplified:bool = True, amend_filing:bool = True):
         """Returns the latest 13F-HR filing."""
         self._get_last_100_13f_filings_url()
         # Grab latest 13F-HR filing, do not grab amendment filings ("13F-HR/A")
-        url = self._13f_filings['url'][0]
-        filing_date = self._13f_filings['Filing Date'][0]
+        filing_index = self._13f_index()
+        qtr_year_str = self._latest_13f_qtr_year
+        url, filing_date = filing_index[qtr_year_str]
 
         latest_13f_cover_page, latest_holdings_table, latest_simplified_holdings_table = self._parse_13f_url(url,filing_date)
         
-        qtr_year_str = self._recent_qtr_year(self._13f_filings['Filing Date'][0])
         if amend_filing and len(self._13f_amendment_filings) > 0:
             latest_13f_cover_page, latest_holdings_table, latest_simplified_holdings_table = self._apply_amendments(qtr_year_str, latest_13f_cover_page, latest_holdings_table, latest_simplified_holdings_table)
 
@@ -254,94 +383,107 @@ class FilingBase():
                         qtr_year_str:{
                             "Cover Page":latest_13f_cover_page, 
                             "Period of Report":latest_13f_cover_page['period_of_report'],
-                            "Holdings Table":latest_holdings_table.to_json(), 
-                            "Simplified Holdings Table":latest_simplified_holdings_table.to_json(), 
+                            "Holdings Table":latest_holdings_table, 
+                            "Simplified Holdings Table":latest_simplified_holdings_table, 
                             "Fund Value":latest_13f_cover_page['portfolio_value'], 
                             "Holdings Count":latest_13f_cover_page['count_holdings'],
                             "Simplified Holdings Count":len(latest_simplified_holdings_table),
                             "Latest 13F":True,
                             "Amended Filing":amend_filing
                             }})
+        if self._history is not None:
+            self._history.add(self.cik, qtr_year_str, latest_simplified_holdings_table)
         
         if simplified==True: 
             return latest_simplified_holdings_table
         else: 
             return latest_holdings_table
         
+    def _latest_13f_record(self):
+        """Returns the filing store record of the latest 13F-HR, fetching it if it has not been already."""
+        for record in self.filings.values():
+            if record.get('Latest 13F'):
+                return record
+        self.get_latest_13f_filing()
+        return self.filings[self._latest_13f_qtr_year]
+
     def get_latest_13f_filing_cover_page(self):
         """Returns the latest 13F-HR filing cover page."""
-        latest_qtr_year = [x for x in self.filings.keys() if self.filings[x]['Latest 13F']]
-        if len(latest_qtr_year) >0:
-            return self.filings[latest_qtr_year[0]]['Cover Page']
-        else:
-            self.get_latest_13f_filing()
-            latest_qtr_year = [x for x in self.filings.keys() if self.filings[x]['Latest 13F']]
-            return self.filings[latest_qtr_year[0]]['Cover Page']
+        return self._latest_13f_record()['Cover Page']
 
     def get_latest_13f_value(self):
         """Returns the latest 13F-HR value of fund value"""
-        latest_qtr_year = [x for x in self.filings.keys() if self.filings[x]['Latest 13F']]
-        if len(latest_qtr_year) >0:
-            return self.filings[latest_qtr_year[0]]['Fund Value']
-        else:
-            self.get_latest_13f_filing()
-            latest_qtr_year = [x for x in self.filings.keys() if self.filings[x]['Latest 13F']]
-            return self.filings[latest_qtr_year[0]]['Fund Value']
+        return self._latest_13f_record()['Fund Value']
 
     def get_latest_13f_num_holdings(self, holdings_type:str = 'Simplified Holdings Count'):
         """Returns the latest 13F-HR number of holdings"""
-        latest_qtr_year = [x for x in self.filings.keys() if self.filings[x]['Latest 13F']]
-        if len(latest_qtr_year) >0:
-            return self.filings[latest_qtr_year[0]][holdings_type]
-        else:
-            self.get_latest_13f_filing()
-            latest_qtr_year = [x for x in self.filings.keys() if self.filings[x]['Latest 13F']]
-            return self.filings[latest_qtr_year[0]][holdings_type]
+        return self._latest_13f_record()[holdings_type]
 
     def get_13f_filing(self, cal_qtr_year:str, amend_filing:bool=True):
         """Returns the requested 13F-HR filing."""
+        if cal_qtr_year in self.filings:    # Stored (or loaded) filings are returned without reading the listing.
+            return self.filings[cal_qtr_year]["Cover Page"], self.filings[cal_qtr_year]["Holdings Table"], self.filings[cal_qtr_year]["Simplified Holdings Table"]
         self._get_last_100_13f_filings_url()
-        if len(self.filings) != 0:
-            if cal_qtr_year in self.filings:
-                return self.filings[cal_qtr_year]["Cover Page"], pd.read_json(self.filings[cal_qtr_year]["Holdings Table"]), pd.read_json(self.filings[cal_qtr_year]["Simplified Holdings Table"])
-        filing_url_date = None
-        latest_13_f_filing = False
-        for index, row in self._13f_filings.iterrows():
-            datetime_obj = datetime.strptime(row['Filing Date'], '%Y-%m-%d')
-            quarter_dict = {1:4, 2:1, 3:2, 4:3} # Every statement released is for the previous quarter.
-            release_qtr = quarter_dict[(datetime_obj.month - 1)//3 + 1]
-            year = datetime_obj.year
-            if release_qtr == 4:    # Anything released in the previous quarter will have a year of last year (e.g. report is for 31st Dec 2022, yet report was released on the 1st Feb 2023)
-                year = year - 1
-
-            if "Q{}-{}".format(release_qtr, year) == cal_qtr_year:
-                filing_url_date = row['Filing Date']
-                filing_url = row['url']
-                if index == 0:
-                    latest_13_f_filing = True
-        
-        
-        if filing_url_date == None:
+        filing = self._13f_index().get(cal_qtr_year)
+        if filing is None:
             raise Exception("No filing could be found for the period {}".format(cal_qtr_year))
+        filing_url, filing_url_date = filing
 
         cover_page, holdings_table, simplified_holdings_table = self._parse_13f_url(filing_url, filing_url_date)
         
-        qtr_year_str = self._recent_qtr_year(filing_url_date)
         if amend_filing and len(self._13f_amendment_filings)>0:
-            cover_page, holdings_table, simplified_holdings_table = self._apply_amendments(qtr_year_str, cover_page, holdings_table, simplified_holdings_table)
+            cover_page, holdings_table, simplified_holdings_table = self._apply_amendments(cal_qtr_year, cover_page, holdings_table, simplified_holdings_table)
         
         self.filings.update({
                         cal_qtr_year:{
                             "Cover Page":cover_page, 
                             "Period of Report":cover_page['period_of_report'],
-                            "Holdings Table":holdings_table.to_json(), 
-                            "Simplified Holdings Table":simplified_holdings_table.to_json(), 
+                            "Holdings Table":holdings_table, 
+                            "Simplified Holdings Table":simplified_holdings_table, 
                             "Fund Value":cover_page['portfolio_value'], 
                             "Holdings Count":cover_page['count_holdings'],
                             "Simplified Holdings Count":len(simplified_holdings_table),
-                            "Latest 13F":latest_13_f_filing}})
+                            "Latest 13F":cal_qtr_year == self._latest_13f_qtr_year}})
+        if self._history is not None:
+            self._history.add(self.cik, cal_qtr_year, simplified_holdings_table)
 
         return cover_page, holdings_table, simplified_holdings_table
 
-    
-    
\ No newline at end of file
+    def get_13f_filings(self, start_qtr:str, end_qtr:str, simplified:bool = True, amend_filing:bool = True):
+        """Returns every 13F-HR filing between two calendar quarters (inclusive, e.g. 'Q1-2013' to 'Q4-2023') stacked into a single holdings table indexed by quarter. The complete filing history is read from EDGAR and the quarters are fetched and parsed concurrently.
+        A quarter that cannot be fetched or parsed (e.g. an older text format 13F-HR) is left out and its exception recorded in 'errors' rather than failing the whole range."""
+        start_key, end_key = self._qtr_year_key(start_qtr), self._qtr_year_key(end_qtr)
+        self._get_all_13f_filings_url()
+        qtr_years = sorted((x for x in self._13f_index() if start_key <= self._qtr_year_key(x) <= end_key), key=self._qtr_year_key)
+        if amend_filing and len(self._13f_amendment_filings) > 0:
+            self._13f_amendment_chains_index()     # Resolve once up front rather than in each worker.
+
+        table_index = 2 if simplified else 1
+        self.errors = {}
+        tables = {}
+        with ThreadPoolExecutor(max_workers=_MAX_WORKERS_) as executor:
+            futures = {qtr_year: executor.submit(self.get_13f_filing, qtr_year, amend_filing) for qtr_year in qtr_years}
+            for qtr_year, future in futures.items():
+                try:
+                    tables[qtr_year] = future.result()[table_index]
+                except Exception as e:
+                    self.errors[qtr_year] = e
+        if len(tables) == 0:
+            return pd.DataFrame()
+        return pd.concat(tables.values(), keys=list(tables.keys()), names=['Quarter', None])
+
+    def get_13f_holdings_changes(self, previous_qtr:str, current_qtr:str, amend_filing:bool = True):
+        """Returns the position changes (new positions, exits, adds and trims with share and value deltas) between two calendar quarters' simplified holdings tables."""
+        previous_table = self.get_13f_filing(previous_qtr, amend_filing)[2]
+        current_table = self.get_13f_filing(current_qtr, amend_filing)[2]
+        return compare_holdings(previous_table, current_table)
+
+    def get_13f_holdings_change_history(self, start_qtr:str, end_qtr:str, amend_filing:bool = True):
+        """Returns the position changes between each pair of consecutive filed quarters in the range, stacked into a single table indexed by the later quarter."""
+        self.get_13f_filings(start_qtr, end_qtr, amend_filing=amend_filing)
+        start_key, end_key = self._qtr_year_key(start_qtr), self._qtr_year_key(end_qtr)
+        qtr_years = sorted((x for x in self.filings if start_key <= self._qtr_year_key(x) <= end_key), key=self._qtr_year_key)
+        changes = [compare_holdings(self.filings[previous]["Simplified Holdings Table"], self.filings[current]["Simplified Holdings Table"]) for previous, current in zip(qtr_years, qtr_years[1:])]
+        if len(changes) == 0:
+            return pd.DataFrame()
+        return pd.concat(changes, keys=qtr_years[1:], names=['Quarter', None])
@@ -0,0 +1,70 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from .filing import Filing
+
+_DEFAULT_MAX_WORKERS_ = 8
+
+
+class FilingBatch():
+    """Fetches 13F filings for many CIKs concurrently.
+
+    Work is fanned out over a thread pool. Every 'Filing' shares the same transport (and therefore the same rate limit),
+    so adding workers never pushes requests past the SEC's fair access limit. Failures are recorded per CIK in 'errors'
+    rather than stopping the whole batch."""
+    def __init__(self, ciks, declared_user=None, max_workers:int = _DEFAULT_MAX_WORKERS_, **filing_kwargs):
+        self.ciks = list(dict.fromkeys(ciks))   # Drop duplicates, keep order.
+        self.declared_user = declared_user
+        self.max_workers = max_workers
+        self._filing_kwargs = filing_kwargs     # Passed through to each 'Filing' (e.g. parser, transport, cache).
+        self.filings = {}   # CIK -> Filing, kept so repeat calls reuse each filing's listing and stored filings.
+        self.errors = {}    # CIK -> Exception raised by the most recent call.
+
+    def _get_filing(self, cik:str):
+        if cik not in self.filings:
+            self.filings[cik] = Filing(cik, declared_user=self.declared_user, **self._filing_kwargs)
+        return self.filings[cik]
+
+    def _run(self, func):
+        """Runs 'func(filing)' for every CIK concurrently. Returns {cik: result} for the CIKs that succeeded."""
+        self.errors = {}
+        def _task(cik):
+            return func(self._get_filing(cik))
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {cik: executor.submit(_task, cik) for cik in self.ciks}
+            for cik, future in futures.items():
+                try:
+                    results[cik] = future.result()
+                except Exception as e:
+                    self.errors[cik] = e
+        return results
+
+    def _combine(self, tables:dict):
+        """Stacks per CIK tables into a single DataFrame keyed (indexed) by CIK."""
+        if len(tables) == 0:
+            return pd.DataFrame()
+        return pd.concat(tables.values(), keys=tables.keys(), names=['CIK', None])
+
+    def latest_13f_filings(self, simplified:bool = True, amend_filing:bool = True):
+        """Returns the latest 13F-HR holdings of every CIK in a single DataFrame indexed by CIK."""
+        return self._combine(self._run(lambda filing: filing.latest_13f_filing(simplified, amend_filing)))
+
+    def get_13f_filings(self, qtr_year:str, simplified:bool = True, amend_filing:bool = True):
+        """Returns the 13F-HR holdings of every CIK for the requested calendar quarter (e.g. 'Q2-2022') in a single
+        DataFrame indexed by CIK."""
+        table_index = 2 if simplified else 1
+        return self._combine(self._run(lambda filing: filing.get_a_13f_filing(qtr_year, amend_filing)[table_index]))
+
+    def cover_pages(self, qtr_year:str = None):
+        """Returns the cover pages already fetched by this batch as {cik: cover page} (latest filing if no quarter given)."""
+        cover_pages = {}
+        for cik, filing in self.filings.items():
+            if qtr_year is None:
+                if filing._latest_13f_qtr_year in filing.filings:
+                    cover_pages[cik] = filing.filings[filing._latest_13f_qtr_year]['Cover Page']
+            elif qtr_year in filing.filings:
+                cover_pages[cik] = filing.filings[qtr_year]['Cover Page']
+        return cover_pages
@@ -0,0 +1,227 @@
+import csv
+import os
+import zipfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .base import merge_amendment
+from .parsers import _HOLDINGS_COLUMNS_, get_dollar_value_multiplier, simplify_holdings_table
+from .store import FilingStore
+
+_DEFAULT_CHUNKSIZE_ = 250000
+_13F_FORMS_ = ("13F-HR", "13F-HR/A")
+
+# INFOTABLE.tsv column -> holdings table column.
+_INFOTABLE_TEXT_COLUMNS_ = {
+    "NAMEOFISSUER": "Name of issuer",
+    "TITLEOFCLASS": "Title of class",
+    "CUSIP": "CUSIP",
+    "SSHPRNAMTTYPE": "Share or principal type",
+    "INVESTMENTDISCRETION": "Investment discretion",
+    "OTHERMANAGER": "Other manager",
+}
+_INFOTABLE_INT_COLUMNS_ = {
+    "VALUE": "Holding value",
+    "SSHPRNAMT": "Share or principal amount count",
+    "VOTING_AUTH_SOLE": "Voting authority sole count",
+    "VOTING_AUTH_SHARED": "Voting authority shared count",
+    "VOTING_AUTH_NONE": "Voting authority none count",
+}
+
+
+def _to_date(date:str, output_format:str):
+    """Converts a data set date (e.g. '31-DEC-2022') to the format used by the filings themselves."""
+    try:
+        return datetime.strptime(date, '%d-%b-%Y').strftime(output_format)
+    except (TypeError, ValueError):
+        return "N/A" if not date else date
+
+
+def _text(value):
+    return value if isinstance(value, str) and value != "" else "N/A"
+
+
+def _int(value):
+    return int(value) if pd.notna(value) and value != "" else 0
+
+
+class BulkDataset():
+    """Reads an SEC 'Form 13F data set' ZIP (reference: https://www.sec.gov/dera/data/form-13f) from local disk.
+
+    The TSVs are streamed out of the ZIP in chunks, keeping only the rows for the requested CIKs, and turned into the same
+    cover page dictionaries and holdings tables 'FilingBase' builds from the individual filings (including amendments and
+    the thousands/nearest dollar value multiplier), without any network requests."""
+    def __init__(self, path:str, chunksize:int = _DEFAULT_CHUNKSIZE_):
+        self.path = path
+        self.chunksize = chunksize
+        self._submissions = None
+
+    def _member(self, archive:zipfile.ZipFile, table:str):
+        for name in archive.namelist():
+            if os.path.basename(name).upper() == "{}.TSV".format(table):
+                return name
+        raise Exception("{}.tsv could not be found in {}".format(table, self.path))
+
+    def _iter_table(self, table:str, usecols:list = None, dtype=str):
+        """Streams a TSV out of the ZIP, 'chunksize' rows at a time."""
+        with zipfile.ZipFile(self.path) as archive:
+            with archive.open(self._member(archive, table)) as f:
+                reader = pd.read_csv(f, sep='\t', dtype=dtype, usecols=usecols, keep_default_na=False, na_values=[""], quoting=csv.QUOTE_NONE,
+                                     chunksize=self.chunksize, encoding='utf-8', encoding_errors='replace')
+                for chunk in reader:
+                    yield chunk
+
+    def _read_table(self, table:str, accessions:set = None, usecols:list = None, dtype=str):
+        """Streams a TSV out of the ZIP in chunks, keeping only the rows for 'accessions' (if given)."""
+        kept = []
+        for chunk in self._iter_table(table, usecols, dtype):
+            if accessions is not None:
+                chunk = chunk[chunk['ACCESSION_NUMBER'].isin(accessions)]
+            if len(chunk) > 0:
+                kept.append(chunk)
+        if len(kept) == 0:
+            return pd.DataFrame(columns=usecols)
+        return pd.concat(kept, ignore_index=True)
+
+    def submissions(self, ciks:list = None):
+        """Returns the 13F-HR and 13F-HR/A submissions in the data set (optionally limited to 'ciks'), oldest first."""
+        if self._submissions is None:
+            submissions = self._read_table("SUBMISSION", usecols=["ACCESSION_NUMBER", "FILING_DATE", "SUBMISSIONTYPE", "CIK", "PERIODOFREPORT"])
+            submissions = submissions[submissions['SUBMISSIONTYPE'].isin(_13F_FORMS_)].copy()
+            submissions['CIK'] = submissions['CIK'].str.zfill(10)
+            submissions['Filing Date'] = pd.to_datetime(submissions['FILING_DATE'], format='%d-%b-%Y').dt.strftime('%Y-%m-%d')
+            period = pd.to_datetime(submissions['PERIODOFREPORT'], format='%d-%b-%Y')
+            submissions['Period of Report Quarter Year'] = "Q" + (period.dt.month // 3).astype(str) + "-" + period.dt.year.astype(str)
+            self._submissions = submissions.sort_values(['Filing Date', 'ACCESSION_NUMBER'], kind='stable').reset_index(drop=True)
+        if ciks is None:
+            return self._submissions
+        return self._submissions[self._submissions['CIK'].isin([str(x).zfill(10) for x in ciks])]
+
+    def _cover_pages(self, submissions:pd.DataFrame, accessions:set):
+        cover = self._read_table("COVERPAGE", accessions, usecols=["ACCESSION_NUMBER", "AMENDMENTTYPE", "FILINGMANAGER_NAME", "FILINGMANAGER_STREET1",
+                                                                   "FILINGMANAGER_CITY", "FILINGMANAGER_STATEORCOUNTRY", "FILINGMANAGER_ZIPCODE"])
+        summary = self._read_table("SUMMARYPAGE", accessions, usecols=["ACCESSION_NUMBER", "TABLEENTRYTOTAL", "TABLEVALUETOTAL"])
+        signature = self._read_table("SIGNATURE", accessions, usecols=["ACCESSION_NUMBER", "NAME", "TITLE", "PHONE", "CITY", "STATEORCOUNTRY", "SIGNATUREDATE"])
+        merged = submissions.merge(cover, on="ACCESSION_NUMBER", how="left").merge(summary, on="ACCESSION_NUMBER", how="left").merge(signature, on="ACCESSION_NUMBER", how="left")
+        merged['MULTIPLIER'] = merged['Filing Date'].map(get_dollar_value_multiplier)
+
+        cover_pages = {}
+        for row in merged.itertuples(index=False):
+            cover_pages[row.ACCESSION_NUMBER] = {
+                "filing_manager":_text(row.FILINGMANAGER_NAME),
+                "business_address":", ".join(_text(x) for x in (row.FILINGMANAGER_STREET1, row.FILINGMANAGER_CITY, row.FILINGMANAGER_STATEORCOUNTRY, row.FILINGMANAGER_ZIPCODE)),
+                "submission_type":row.SUBMISSIONTYPE,
+                "period_of_report":_to_date(row.PERIODOFREPORT, '%m-%d-%Y'),
+                "signature_name":_text(row.NAME),
+                "signature_title":_text(row.TITLE),
+                "signature_phone":_text(row.PHONE),
+                "signature_city":_text(row.CITY),
+                "signature_state":_text(row.STATEORCOUNTRY),
+                "signature_date":_to_date(row.SIGNATUREDATE, '%m-%d-%Y'),
+                "amendment_type":_text(row.AMENDMENTTYPE) if row.SUBMISSIONTYPE == "13F-HR/A" else 'N/A',
+                "portfolio_value":_int(row.TABLEVALUETOTAL) * int(row.MULTIPLIER),
+                "count_holdings":_int(row.TABLEENTRYTOTAL),
+                "filing_amended":False,
+            }
+        return cover_pages
+
+    def _holdings_tables(self, submissions:pd.DataFrame, accessions:set):
+        """Streams INFOTABLE.tsv once, yielding (accession number, holdings table) as the reader moves past each accession's rows
+        (the data sets list an accession's rows together)."""
+        dtype = {column: str for column in _INFOTABLE_TEXT_COLUMNS_}
+        dtype.update({column: "Int64" for column in _INFOTABLE_INT_COLUMNS_})
+        dtype["ACCESSION_NUMBER"] = str
+        multipliers = submissions.set_index('ACCESSION_NUMBER')['Filing Date'].map(get_dollar_value_multiplier)
+        current, pending = None, []     # The accession being read, and its rows so far (it may span chunks).
+        for info in self._iter_table("INFOTABLE", usecols=["ACCESSION_NUMBER"] + list(_INFOTABLE_TEXT_COLUMNS_) + list(_INFOTABLE_INT_COLUMNS_), dtype=dtype):
+            info = info[info['ACCESSION_NUMBER'].isin(accessions)]
+            if len(info) == 0:
+                continue
+            info = info.rename(columns={**_INFOTABLE_TEXT_COLUMNS_, **_INFOTABLE_INT_COLUMNS_})
+            for column in _INFOTABLE_TEXT_COLUMNS_.values():
+                info[column] = info[column].fillna("N/A")
+            for column in _INFOTABLE_INT_COLUMNS_.values():
+                info[column] = info[column].fillna(0).astype(np.int64)
+            info['Holding value'] = info['Holding value'] * info['ACCESSION_NUMBER'].map(multipliers).astype(np.int64)
+            info['Put or call'] = None
+            for accession, table in info.groupby('ACCESSION_NUMBER', sort=False):
+                if accession != current and current is not None:
+                    yield current, pd.concat(pending, ignore_index=True)
+                    pending = []
+                current = accession
+                pending.append(table[_HOLDINGS_COLUMNS_])
+        if current is not None:
+            yield current, pd.concat(pending, ignore_index=True)
+
+    def iter_filings(self, ciks:list = None, amend_filing:bool = True):
+        """Yields (cik, qtr_year, cover page, holdings table, simplified holdings table) for every 13F-HR in the data set (optionally limited to 'ciks'), with any 13F-HR/A amendments in the data set applied chronologically.
+        INFOTABLE.tsv is read in a single pass and each filing is yielded as soon as the rows of its 13F-HR and amendments have been read, so only the holdings of filings still being read are held in memory."""
+        submissions = self.submissions(ciks)
+        cover_pages = self._cover_pages(submissions, set(submissions['ACCESSION_NUMBER']))
+        empty_table = pd.DataFrame(columns=_HOLDINGS_COLUMNS_)
+
+        chains = {}     # (cik, qtr_year) -> accession numbers of the 13F-HR and its amendments, oldest first.
+        for (cik, qtr_year), group in submissions.groupby(['CIK', 'Period of Report Quarter Year'], sort=False):
+            originals = group[group['SUBMISSIONTYPE'] == "13F-HR"]
+            if len(originals) == 0:     # Amendments to a filing that is not in this data set.
+                continue
+            chains[(cik, qtr_year)] = [originals['ACCESSION_NUMBER'].iloc[0]] + (group.loc[group['SUBMISSIONTYPE'] == "13F-HR/A", 'ACCESSION_NUMBER'].tolist() if amend_filing else [])
+        owners = {accession: key for key, chain in chains.items() for accession in chain}
+        # Accessions whose summary page reports no holdings have no rows to wait for.
+        waiting = {key: set(x for x in chain if cover_pages[x]['count_holdings'] > 0) for key, chain in chains.items()}
+        tables = {}
+
+        def _filing(key):
+            cik, qtr_year = key
+            filings = []
+            for accession in chains.pop(key):
+                holdings_table = tables.pop(accession, empty_table)
+                filings.append((cover_pages[accession], holdings_table, simplify_holdings_table(holdings_table)))
+            cover_page, holdings_table, simplified_holdings_table = filings[0]
+            for amendment in filings[1:]:
+                cover_page, holdings_table, simplified_holdings_table = merge_amendment(cover_page, holdings_table, simplified_holdings_table, *amendment)
+            return cik, qtr_year, cover_page, holdings_table, simplified_holdings_table
+
+        for key in [key for key, expected in waiting.items() if len(expected) == 0]:
+            del waiting[key]
+            yield _filing(key)
+        for accession, holdings_table in self._holdings_tables(submissions, set(owners)):
+            key = owners[accession]
+            if key not in chains:   # Rows the summary page did not report, the filing has already been yielded.
+                continue
+            tables[accession] = pd.concat([tables[accession], holdings_table], ignore_index=True) if accession in tables else holdings_table
+            waiting[key].discard(accession)
+            if len(waiting[key]) == 0:
+                del waiting[key]
+                yield _filing(key)
+        for key in list(waiting):   # Reported holdings missing from INFOTABLE.tsv.
+            del waiting[key]
+            yield _filing(key)
+
+    def load(self, ciks:list = None, amend_filing:bool = True):
+        """Returns {cik: FilingStore} holding every filing in the data set (optionally limited to 'ciks')."""
+        stores = {}
+        for cik, qtr_year, cover_page, holdings_table, simplified_holdings_table in self.iter_filings(ciks, amend_filing):
+            stores.setdefault(cik, FilingStore())[qtr_year] = {
+                "Cover Page":cover_page,
+                "Period of Report":cover_page['period_of_report'],
+                "Holdings Table":holdings_table,
+                "Simplified Holdings Table":simplified_holdings_table,
+                "Fund Value":cover_page['portfolio_value'],
+                "Holdings Count":cover_page['count_holdings'],
+                "Simplified Holdings Count":len(simplified_holdings_table),
+                "Latest 13F":False,
+                "Amended Filing":amend_filing,
+            }
+        return stores
+
+    def populate(self, filing, amend_filing:bool = True):
+        """Adds the data set's filings for a 'Filing' object's CIK to its filing store."""
+        stores = self.load([filing.cik], amend_filing)
+        for qtr_year, record in stores.get(filing.cik, {}).items():
+            filing.filings.setdefault(qtr_year, record)
+            if filing.manager is None:
+                filing.manager = record['Cover Page']['filing_manager']
+        return filing.filings
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+_DEFAULT_CACHE_DIR_ = os.path.join(os.path.expanduser('~'), '.cache', 'finsec')
+_DEFAULT_MAX_BYTES_ = 2 * 1024 ** 3
+_ACCESSION_RE_ = re.compile(r'/Archives/edgar/data/\d+/(\d{18})/')
+
+
+class CacheMissError(Exception):
+    """Raised when an offline cache is asked for a document it does not hold."""
+
+
+class DocumentCache():
+    """Disk backed, content addressed cache of EDGAR documents.
+
+    Documents are stored once per unique body (sha256 digest) and indexed by url. Filing documents live under their
+    accession number's folder and never change once accepted, so they are cached without expiry. Mutable pages (e.g. the
+    browse-edgar listing) are given a 'ttl' by the caller. The least recently used documents are evicted once the cache
+    grows past 'max_bytes'. An 'offline' cache serves only what it already holds (ignoring any 'ttl') and never touches
+    the network."""
+    def __init__(self, directory:str = None, max_bytes:int = _DEFAULT_MAX_BYTES_, offline:bool = False):
+        self.directory = directory if directory is not None else _DEFAULT_CACHE_DIR_
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._objects_dir = os.path.join(self.directory, 'objects')
+        os.makedirs(self._objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.directory, 'index.sqlite'), timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS documents (
+                                    key TEXT PRIMARY KEY, accession TEXT, digest TEXT NOT NULL, size INTEGER NOT NULL,
+                                    fetched REAL NOT NULL, accessed REAL NOT NULL)""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS documents_accessed ON documents (accessed)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS documents_accession ON documents (accession)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS vals (namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (namespace, key))")
+
+    def _object_path(self, digest:str):
+        return os.path.join(self._objects_dir, digest[:2], digest[2:])
+
+    def get(self, key:str, ttl:float = None):
+        """Returns the cached document body (bytes) for 'key', or None if it is not cached (or older than 'ttl' seconds)."""
+        with self._lock:
+            row = self._conn.execute("SELECT digest, fetched FROM documents WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            digest, fetched = row
+            now = time.time()
+            if ttl is not None and not self.offline and now - fetched > ttl:
+                return None
+            try:
+                with open(self._object_path(digest), 'rb') as f:
+                    content = f.read()
+            except FileNotFoundError:   # Object removed from underneath the index, treat as a miss.
+                with self._conn:
+                    self._conn.execute("DELETE FROM documents WHERE key = ?", (key,))
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE documents SET accessed = ? WHERE key = ?", (now, key))
+        return content
+
+    def put(self, key:str, content:bytes):
+        """Stores a document body under 'key', evicting the least recently used documents if the cache is over size."""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        accession = _ACCESSION_RE_.search(key)
+        now = time.time()
+        with self._lock:
+            if not os.path.exists(path):    # Written under the lock, so it cannot be unlinked as another key's old body in between.
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())
+                with open(tmp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+            row = self._conn.execute("SELECT digest FROM documents WHERE key = ?", (key,)).fetchone()
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO documents (key, accession, digest, size, fetched, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                                   (key, accession.group(1) if accession else None, digest, len(content), now, now))
+            if row is not None and row[0] != digest:    # The replaced body (e.g. an expired listing page), unless another key shares it.
+                self._remove_object(row[0])
+            self._evict()
+
+    def _remove_object(self, digest:str):
+        """Deletes a document body if no key refers to it any longer. Caller holds the lock. Returns True if it was unreferenced."""
+        if self._conn.execute("SELECT 1 FROM documents WHERE digest = ? LIMIT 1", (digest,)).fetchone() is not None:
+            return False
+        try:
+            os.remove(self._object_path(digest))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _evict(self):
+        """Removes least recently used documents until the cache fits within 'max_bytes'. Caller holds the lock."""
+        total = self._size()
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, digest, size FROM documents ORDER BY accessed ASC").fetchall()
+        for key, digest, size in rows:
+            if total <= self.max_bytes:
+                break
+            with self._conn:
+                self._conn.execute("DELETE FROM documents WHERE key = ?", (key,))
+            if self._remove_object(digest):
+                total -= size
+
+    def get_value(self, namespace:str, key:str):
+        """Returns a value recorded with 'set_value' (e.g. details parsed out of an immutable filing), or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM vals WHERE namespace = ? AND key = ?", (namespace, key)).fetchone()
+        return row[0] if row is not None else None
+
+    def set_value(self, namespace:str, key:str, value:str):
+        """Records a small derived value in the persistent index. Values are not subject to eviction."""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO vals (namespace, key, value) VALUES (?, ?, ?)", (namespace, key, value))
+
+    def _size(self):
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM documents)").fetchone()[0]
+
+    def size(self):
+        """Total bytes of the (unique) documents held in the cache."""
+        with self._lock:
+            return self._size()
+
+    def accession_keys(self, accession:str):
+        """Returns the cached document keys belonging to an accession number (dashes optional)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT key FROM documents WHERE accession = ? ORDER BY key", (accession.replace('-', ''),)).fetchall()
+        return [row[0] for row in rows]
+
+    def clear(self):
+        """Removes every document (and recorded value) from the cache."""
+        with self._lock:
+            digests = [row[0] for row in self._conn.execute("SELECT DISTINCT digest FROM documents").fetchall()]
+            with self._conn:
+                self._conn.execute("DELETE FROM documents")
+                self._conn.execute("DELETE FROM vals")
+            for digest in digests:
+                try:
+                    os.remove(self._object_path(digest))
+                except FileNotFoundError:
+                    pass
+
+    def close(self):
+        self._conn.close()
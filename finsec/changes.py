@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from .lazy import LazyModule
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+_POSITION_KEYS_ = ['CUSIP', 'Title of class', 'Share or principal type']
+_CHANGE_COLUMNS_ = ['Name of issuer', 'Title of class', 'CUSIP', 'Share or principal type',
+                    'Previous share or principal amount count', 'Share or principal amount count', 'Share change', 'Share change (%)',
+                    'Previous holding value', 'Holding value', 'Value change', 'Change type']
+
+
+def _positions(simplified_holdings_table:pd.DataFrame):
+    """Collapses a simplified holdings table to one row per position. A table can hold duplicate positions once a
+    'NEW HOLDINGS' amendment has been appended to the original filing."""
+    if len(simplified_holdings_table) == 0:
+        return pd.DataFrame(columns=_POSITION_KEYS_ + ['Name of issuer', 'Holding value', 'Share or principal amount count'])
+    return simplified_holdings_table.groupby(_POSITION_KEYS_, sort=False, as_index=False).agg({
+        'Name of issuer': 'first', 'Holding value': 'sum', 'Share or principal amount count': 'sum'})
+
+
+def compare_holdings(previous_table:pd.DataFrame, current_table:pd.DataFrame):
+    """Compares two simplified holdings tables position by position (CUSIP, title of class and share/principal type).
+
+    Returns one row per position held in either table with the share and value deltas and a 'Change type' of 'New',
+    'Exit', 'Add', 'Trim' or 'Unchanged'."""
+    previous, current = _positions(previous_table), _positions(current_table)
+    merged = previous.merge(current, on=_POSITION_KEYS_, how='outer', suffixes=(' previous', ''), indicator=True, sort=False)
+
+    previous_shares = merged['Share or principal amount count previous'].fillna(0).astype(np.int64)
+    current_shares = merged['Share or principal amount count'].fillna(0).astype(np.int64)
+    previous_value = merged['Holding value previous'].fillna(0).astype(np.int64)
+    current_value = merged['Holding value'].fillna(0).astype(np.int64)
+    share_change = current_shares - previous_shares
+
+    output = pd.DataFrame({
+        'Name of issuer': merged['Name of issuer'].fillna(merged['Name of issuer previous']),
+        'Title of class': merged['Title of class'],
+        'CUSIP': merged['CUSIP'],
+        'Share or principal type': merged['Share or principal type'],
+        'Previous share or principal amount count': previous_shares,
+        'Share or principal amount count': current_shares,
+        'Share change': share_change,
+        'Share change (%)': (share_change / previous_shares.where(previous_shares != 0)) * 100,
+        'Previous holding value': previous_value,
+        'Holding value': current_value,
+        'Value change': current_value - previous_value,
+    })
+    output['Change type'] = np.select(
+        [merged['_merge'].to_numpy() == 'right_only', merged['_merge'].to_numpy() == 'left_only', share_change.to_numpy() > 0, share_change.to_numpy() < 0],
+        ['New', 'Exit', 'Add', 'Trim'], default='Unchanged')
+    return output[_CHANGE_COLUMNS_].reset_index(drop=True)
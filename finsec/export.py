@@ -0,0 +1,117 @@
+"""
+Streaming export of stored filings to Excel, CSV and Parquet.
+
+Excel workbooks are written with openpyxl's write-only mode, so rows are streamed to disk rather than held as cell
+objects. CSV and Parquet exports write one file per CIK and quarter into a hive style partitioned dataset
+('<root>/cik=<cik>/quarter=<qtr_year>/part-0.<ext>'), writing partitions in parallel. Parquet requires the optional
+pyarrow dependency ('pip install finsec[parquet]').
+
+Each function takes a 'Filing', a 'FilingBatch' or a {cik: Filing or FilingStore} dictionary (Excel also takes a
+single 'FilingStore').
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .lazy import LazyModule
+
+np = LazyModule("numpy")
+openpyxl = LazyModule("openpyxl")
+
+_DEFAULT_MAX_WORKERS_ = 8
+_DEFAULT_CSV_CHUNKSIZE_ = 100000
+_HEADER_STYLE_ = {}     # Header and index cell style used by pandas' 'to_excel' (so streamed workbooks look the same), built on first use.
+
+
+def _table_type(simplified:bool):
+    return "Simplified Holdings Table" if simplified else "Holdings Table"
+
+
+def _stores(filings):
+    """Normalises the supported inputs to {cik: FilingStore}."""
+    if hasattr(filings, 'cik'):     # Filing
+        return {filings.cik: filings.filings}
+    if hasattr(filings, 'ciks'):    # FilingBatch
+        filings = filings.filings
+    return {cik: getattr(store, 'filings', store) for cik, store in filings.items()}
+
+
+def _header_cell(worksheet, value):
+    if len(_HEADER_STYLE_) == 0:
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment, Border, Font, Side
+        thin = Side(style='thin')
+        _HEADER_STYLE_.update(cell=WriteOnlyCell, font=Font(bold=True), border=Border(left=thin, right=thin, top=thin, bottom=thin), alignment=Alignment(horizontal='center', vertical='top'))
+    cell = _HEADER_STYLE_['cell'](worksheet, value=value)
+    cell.font = _HEADER_STYLE_['font']
+    cell.border = _HEADER_STYLE_['border']
+    cell.alignment = _HEADER_STYLE_['alignment']
+    return cell
+
+
+def _excel_value(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value
+
+
+def _write_sheet(workbook, sheet_name:str, header:list, rows):
+    """Streams rows of (index, values...) into a new sheet, laid out as 'DataFrame.to_excel' lays them out."""
+    worksheet = workbook.create_sheet(sheet_name)
+    worksheet.append([None] + [_header_cell(worksheet, x) for x in header])
+    for row in rows:
+        worksheet.append([_header_cell(worksheet, _excel_value(row[0]))] + [_excel_value(x) for x in row[1:]])
+
+
+def write_excel(filings, path:str, simplified:bool = True, inc_cover_page_tabs:bool = False):
+    """Writes a single manager's filings ('Filing' or 'FilingStore') to an Excel workbook with a '<qtr_year>_holdings' sheet per quarter
+    (and a '<qtr_year>_cover_pg' sheet before it if 'inc_cover_page_tabs'). Overwrites 'path'."""
+    store = getattr(filings, 'filings', filings)
+    table_type = _table_type(simplified)
+    workbook = openpyxl.Workbook(write_only=True)
+    for qtr_year, record in store.items():
+        if inc_cover_page_tabs:
+            _write_sheet(workbook, "{}_cover_pg".format(qtr_year), [0], record['Cover Page'].items())
+        table = record[table_type]
+        _write_sheet(workbook, "{}_holdings".format(qtr_year), list(table.columns), table.itertuples(index=True, name=None))
+    workbook.save(path)
+    return path
+
+
+def _write_partitions(filings, root:str, simplified:bool, extension:str, write, max_workers:int):
+    table_type = _table_type(simplified)
+    partitions = []
+    for cik, store in _stores(filings).items():
+        for qtr_year, record in store.items():
+            directory = os.path.join(root, "cik={}".format(cik), "quarter={}".format(qtr_year))
+            partitions.append((record[table_type], directory, os.path.join(directory, "part-0.{}".format(extension))))
+
+    def _write(partition):
+        table, directory, path = partition
+        os.makedirs(directory, exist_ok=True)
+        write(table, path)
+        return path
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_write, partitions))
+
+
+def write_csv(filings, root:str, simplified:bool = True, chunksize:int = _DEFAULT_CSV_CHUNKSIZE_, max_workers:int = _DEFAULT_MAX_WORKERS_):
+    """Writes every stored filing to '<root>/cik=<cik>/quarter=<qtr_year>/part-0.csv', 'chunksize' rows at a time. Returns the paths written."""
+    return _write_partitions(filings, root, simplified, "csv", lambda table, path: table.to_csv(path, index=False, chunksize=chunksize), max_workers)
+
+
+def write_parquet(filings, root:str, simplified:bool = True, compression:str = 'snappy', max_workers:int = _DEFAULT_MAX_WORKERS_):
+    """Writes every stored filing to '<root>/cik=<cik>/quarter=<qtr_year>/part-0.parquet' (readable as one dataset with e.g.
+    'pd.read_parquet(root)'). Requires pyarrow. Returns the paths written."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise Exception("Parquet export requires pyarrow, install it with 'pip install finsec[parquet]'")
+
+    def _write(table, path):
+        pyarrow.parquet.write_table(pyarrow.Table.from_pandas(table, preserve_index=False), path, compression=compression)
+    return _write_partitions(filings, root, simplified, "parquet", _write, max_workers)
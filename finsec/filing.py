@@ -1,6 +1,3 @@
-import requests
-from bs4 import BeautifulSoup as bs
-
 from .base import FilingBase
 
 class Filing(FilingBase):
@@ -8,9 +5,21 @@ class Filing(FilingBase):
     def get_a_13f_filing(self, qtr_year:str, amend_filing:bool = True):
         return self.get_13f_filing(qtr_year, amend_filing)
 
+    def holdings_changes(self, previous_qtr:str, current_qtr:str, amend_filing:bool = True):
+        return self.get_13f_holdings_changes(previous_qtr, current_qtr, amend_filing)
+
+    def holdings_change_history(self, start_qtr:str, end_qtr:str, amend_filing:bool = True):
+        return self.get_13f_holdings_change_history(start_qtr, end_qtr, amend_filing)
+
     def filings_to_excel(self, simplified:bool = True, inc_cover_page_tabs:bool = False):
         return self.convert_filings_to_excel(simplified, inc_cover_page_tabs)
 
+    def filings_to_csv(self, root:str, simplified:bool = True):
+        return self.convert_filings_to_csv(root, simplified)
+
+    def filings_to_parquet(self, root:str, simplified:bool = True):
+        return self.convert_filings_to_parquet(root, simplified)
+
     def latest_13f_filing(self, simplified:bool = True, amend_filing:bool = True):
         return self.get_latest_13f_filing(simplified, amend_filing)
 
@@ -0,0 +1,288 @@
+"""
+Recorded EDGAR fixtures: record live responses to disk, replay them from a local stand-in HTTP server and generate
+synthetic managers (including very large information tables) for repeatable tests and benchmarks.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+from datetime import date, timedelta
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, urlsplit
+
+from .transport import RateLimiter, Transport, get_default_transport
+
+_CONTENT_TYPES_ = {'.htm': 'text/html', '.html': 'text/html', '.xml': 'text/xml', '.json': 'application/json', '.txt': 'text/plain'}
+
+
+def fixture_path(directory:str, url:str):
+    """Returns the file a url is recorded to: '<directory>/<host>/<path>', with any query string appended after an '@'."""
+    parts = urlsplit(url)
+    path = os.path.join(directory, parts.netloc, *[x for x in parts.path.split('/') if x])
+    if parts.query:
+        path += '@' + quote(parts.query, safe='')
+    return path
+
+
+def _write(path:str, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content.encode() if isinstance(content, str) else content)
+
+
+class RecordingTransport(Transport):
+    """Wraps a transport and records every response body it receives beneath 'directory' (see 'fixture_path')."""
+    def __init__(self, directory:str, transport:Transport = None):
+        self.directory = directory
+        self.transport = transport if transport is not None else get_default_transport()
+
+    def get(self, url:str, headers:dict = None):
+        response = self.transport.get(url, headers=headers)
+        if response.status_code != 304:     # Not Modified responses have no body.
+            _write(fixture_path(self.directory, url), response.content)
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class ReplayTransport(Transport):
+    """Transport that sends every request to a local 'FixtureServer' instead of EDGAR. It is not rate limited by default."""
+    def __init__(self, base_url:str, rate_limiter:RateLimiter = None, **kwargs):
+        super().__init__(rate_limiter=rate_limiter if rate_limiter is not None else RateLimiter(rate=1e9, burst=10**9), **kwargs)
+        self.base_url = base_url.rstrip('/')
+
+    def get(self, url:str, headers:dict = None):
+        parts = urlsplit(url)
+        local_url = "{}/{}{}".format(self.base_url, parts.netloc, parts.path) + ("?" + parts.query if parts.query else "")
+        return super().get(local_url, headers=headers)
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # Keep-alive, as per EDGAR.
+
+    def do_GET(self):
+        host, _, rest = self.path.lstrip('/').partition('/')
+        path = fixture_path(self.server.directory, "https://{}/{}".format(host, rest))
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, 'rb') as f:
+            content = f.read()
+        self.server.requests.append(self.path)
+        # Conditional GET support, as per EDGAR. If-None-Match takes precedence over If-Modified-Since.
+        etag = '"{}"'.format(hashlib.md5(content).hexdigest())
+        modified = int(os.path.getmtime(path))
+        if_none_match = self.headers.get('If-None-Match')
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_none_match is not None:
+            not_modified = etag in [x.strip() for x in if_none_match.split(',')]
+        elif if_modified_since is not None:
+            try:
+                not_modified = modified <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                not_modified = False
+        else:
+            not_modified = False
+        if not_modified:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', formatdate(modified, usegmt=True))
+        self.send_header('Content-Type', _CONTENT_TYPES_.get(os.path.splitext(rest.split('?')[0])[1], 'application/octet-stream'))
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            content = gzip.compress(content, compresslevel=1)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer():
+    """Local stand-in for www.sec.gov / data.sec.gov serving recorded (or synthetic) fixtures from 'directory'.
+
+    Use as a context manager and pass 'server.transport()' to 'Filing' objects."""
+    def __init__(self, directory:str):
+        self.directory = directory
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return "http://{}:{}".format(*self._server.server_address[:2])
+
+    @property
+    def requests(self):
+        """Paths requested from the server so far."""
+        return self._server.requests
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _FixtureHandler)
+        self._server.daemon_threads = True
+        self._server.directory = self.directory
+        self._server.requests = []
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def transport(self, **kwargs):
+        return ReplayTransport(self.url, **kwargs)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def _quarter_end(year:int, qtr:int):
+    return date(year, qtr * 3, 30 if qtr in (2, 3) else 31)
+
+
+def _info_table_xml(holdings:list):
+    rows = []
+    for name, cusip, value, shares, other_manager in holdings:
+        rows.append("""  <ns1:infoTable>
+    <ns1:nameOfIssuer>{}</ns1:nameOfIssuer>
+    <ns1:titleOfClass>COM</ns1:titleOfClass>
+    <ns1:cusip>{}</ns1:cusip>
+    <ns1:value>{}</ns1:value>
+    <ns1:shrsOrPrnAmt><ns1:sshPrnamt>{}</ns1:sshPrnamt><ns1:sshPrnamtType>SH</ns1:sshPrnamtType></ns1:shrsOrPrnAmt>
+    <ns1:investmentDiscretion>DFND</ns1:investmentDiscretion>
+    <ns1:otherManager>{}</ns1:otherManager>
+    <ns1:votingAuthority><ns1:Sole>{}</ns1:Sole><ns1:Shared>0</ns1:Shared><ns1:None>0</ns1:None></ns1:votingAuthority>
+  </ns1:infoTable>""".format(name, cusip, value, shares, other_manager, shares))
+    return """<?xml version="1.0" encoding="UTF-8"?>
+<ns1:informationTable xmlns:ns1="http://www.sec.gov/edgar/document/thirteenf/informationtable">
+{}
+</ns1:informationTable>
+""".format("\n".join(rows))
+
+
+def _primary_doc_xml(manager:str, form:str, period:date, filed:date, holdings:list, amendment_type:str = None):
+    amendment_info = "<amendmentInfo><amendmentType>{}</amendmentType></amendmentInfo>".format(amendment_type) if amendment_type else ""
+    return """<?xml version="1.0" encoding="UTF-8"?>
+<edgarSubmission xmlns="http://www.sec.gov/edgar/thirteenffiler">
+  <headerData><submissionType>{form}</submissionType></headerData>
+  <formData>
+    <coverPage>
+      <reportCalendarOrQuarter>{period}</reportCalendarOrQuarter>
+      {amendment_info}
+      <filingManager><name>{manager}</name><address><street1>1 Synthetic Street</street1><city>Omaha</city><stateOrCountry>NE</stateOrCountry><zipCode>68131</zipCode></address></filingManager>
+    </coverPage>
+    <signatureBlock><name>Jane Doe</name><title>Chief Compliance Officer</title><phone>402-555-0100</phone><city>Omaha</city><stateOrCountry>NE</stateOrCountry><signatureDate>{filed}</signatureDate></signatureBlock>
+    <summaryPage><otherIncludedManagersCount>0</otherIncludedManagersCount><tableEntryTotal>{count}</tableEntryTotal><tableValueTotal>{value}</tableValueTotal></summaryPage>
+  </formData>
+  <periodOfReport>{period}</periodOfReport>
+</edgarSubmission>
+""".format(form=form, period=period.strftime('%m-%d-%Y'), amendment_info=amendment_info, manager=manager, filed=filed.strftime('%m-%d-%Y'),
+           count=len(holdings), value=sum(x[2] for x in holdings))
+
+
+def _index_htm(accession:str, form:str, period:date, filed:date):
+    return """<html><body>
+<div class="formGrouping"><div class="infoHead">Filing Date</div><div class="info">{filed}</div></div>
+<div class="formGrouping"><div class="infoHead">Period of Report</div><div class="info">{period}</div></div>
+<table class="tableFile" summary="Document Format Files">
+<tr><th>Seq</th><th>Description</th><th>Document</th><th>Type</th></tr>
+<tr><td>1</td><td></td><td><a href="{folder}/xslForm13F_X02/primary_doc.xml">primary_doc.html</a></td><td>{form}</td></tr>
+<tr><td>1</td><td></td><td><a href="{folder}/primary_doc.xml">primary_doc.xml</a></td><td>{form}</td></tr>
+<tr><td>2</td><td>INFORMATION TABLE</td><td><a href="{folder}/xslForm13F_X02/infotable.xml">infotable.html</a></td><td>INFORMATION TABLE</td></tr>
+<tr><td>2</td><td>INFORMATION TABLE</td><td><a href="{folder}/infotable.xml">infotable.xml</a></td><td>INFORMATION TABLE</td></tr>
+<tr><td>&nbsp;</td><td>Complete submission text file</td><td><a href="{folder}/{accession}.txt">{accession}.txt</a></td><td>&nbsp;</td></tr>
+</table>
+</body></html>
+""".format(filed=filed.isoformat(), period=period.isoformat(), folder="{folder}", form=form, accession=accession)
+
+
+def _submission_txt(accession:str, form:str, filed:date, primary_doc:str, info_table:str):
+    documents = "".join("""<DOCUMENT>
+<TYPE>{}
+<SEQUENCE>{}
+<FILENAME>{}
+<TEXT>
+<XML>
+{}
+</XML>
+</TEXT>
+</DOCUMENT>
+""".format(doc_type, seq, filename, content.strip()) for seq, (doc_type, filename, content) in enumerate([(form, "primary_doc.xml", primary_doc), ("INFORMATION TABLE", "infotable.xml", info_table)], 1))
+    return """<SEC-DOCUMENT>{accession}.txt : {filed}
+<SEC-HEADER>{accession}.hdr.sgml : {filed}
+ACCESSION NUMBER:\t\t{accession}
+CONFORMED SUBMISSION TYPE:\t{form}
+PUBLIC DOCUMENT COUNT:\t\t2
+</SEC-HEADER>
+{documents}</SEC-DOCUMENT>
+""".format(accession=accession, filed=filed.strftime('%Y%m%d'), form=form, documents=documents)
+
+
+def _listing_htm(filings:list):
+    rows = "\n".join("""<tr><td nowrap="nowrap">{form}</td><td nowrap="nowrap"><a href="{url}" id="documentsbutton">&nbsp;Documents</a></td><td class="small">Quarterly report filed by institutional managers</td><td>{filed}</td><td>028-00000<br>000000000</td></tr>""".format(
+        form=x['form'], url=x['url'], filed=x['filed'].isoformat()) for x in filings)
+    return """<html><body>
+<div id="seriesDiv"><table class="tableFile2" summary="Results">
+<tr><th>Filings</th><th>Format</th><th>Description</th><th>Filing Date</th><th>File/Film Number</th></tr>
+{}
+</table></div>
+</body></html>
+""".format(rows)
+
+
+def write_synthetic_manager(directory:str, cik:str = "0000000001", manager:str = "Synthetic Capital Management LLC", start_qtr_year:tuple = (2021, 1),
+                            quarters:int = 4, holdings:int = 1000, amendments:bool = True, seed:int = 0):
+    """Writes a synthetic 13F filer to 'directory' in fixture layout: the browse-edgar listing, submissions feed, filing
+    index pages, rendered and XML primary documents, information tables and complete submission text files of 'quarters' consecutive 13F-HR filings with
+    'holdings' information table rows each. If 'amendments', the second most recent quarter gets a 'NEW HOLDINGS'
+    13F-HR/A. Returns the list of filings written (newest first)."""
+    rng = random.Random(seed)
+    cik_int = int(cik)
+    securities = [("SYNTHETIC ISSUER {} INC".format(i), "{:08d}{}".format(rng.randrange(10**8), i % 10)) for i in range(max(1, holdings // 3))]
+    filings = []
+    year, qtr = start_qtr_year
+    for i in range(quarters):
+        period = _quarter_end(year, qtr)
+        filed = period + timedelta(days=45)
+        rows = [securities[rng.randrange(len(securities))] + (rng.randrange(1, 10**7), rng.randrange(1, 10**6), "{},{}".format(rng.randrange(1, 15), rng.randrange(1, 15))) for _ in range(holdings)]
+        filings.append({"form": "13F-HR", "period": period, "filed": filed, "holdings": rows, "amendment_type": None})
+        if amendments and i == quarters - 2:
+            extra = [securities[j % len(securities)] + (1000, 100, "1") for j in range(3)]
+            filings.append({"form": "13F-HR/A", "period": period, "filed": filed + timedelta(days=30), "holdings": extra, "amendment_type": "NEW HOLDINGS"})
+        year, qtr = (year + 1, 1) if qtr == 4 else (year, qtr + 1)
+    filings.sort(key=lambda x: x['filed'], reverse=True)
+
+    for filing in sorted(filings, key=lambda x: x['filed']):
+        accession = "{:010d}-{:02d}-{:06d}".format(cik_int, filing['filed'].year % 100, filing['filed'].timetuple().tm_yday)   # Stable as more filings are added.
+        folder = "/Archives/edgar/data/{}/{}".format(cik_int, accession.replace('-', ''))
+        filing.update({"accession": accession, "url": "{}/{}-index.htm".format(folder, accession)})
+        base = fixture_path(directory, "https://www.sec.gov" + folder)
+        nearest_dollar = "Report values rounded to the nearest dollar." if filing['filed'].year >= 2023 else "Report values in thousands of dollars."
+        _write(os.path.join(base, "{}-index.htm".format(accession)), _index_htm(accession, filing['form'], filing['period'], filing['filed']).replace("{folder}", folder))
+        _write(os.path.join(base, "xslForm13F_X02", "primary_doc.xml"), "<html><body><p>Form 13F Summary Page</p><p>{}</p></body></html>".format(nearest_dollar))
+        primary_doc = _primary_doc_xml(manager, filing['form'], filing['period'], filing['filed'], filing['holdings'], filing['amendment_type'])
+        info_table = _info_table_xml(filing['holdings'])
+        _write(os.path.join(base, "primary_doc.xml"), primary_doc)
+        _write(os.path.join(base, "xslForm13F_X02", "infotable.xml"), "<html><body>Information Table</body></html>")
+        _write(os.path.join(base, "infotable.xml"), info_table)
+        _write(os.path.join(base, "{}.txt".format(accession)), _submission_txt(accession, filing['form'], filing['filed'], primary_doc, info_table))
+
+    _write(fixture_path(directory, "https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&CIK={}&type=13F-HR&count=100".format(cik)), _listing_htm(filings[:100]))
+    recent = {"accessionNumber": [x['accession'] for x in filings], "filingDate": [x['filed'].isoformat() for x in filings],
+              "reportDate": [x['period'].isoformat() for x in filings], "form": [x['form'] for x in filings]}
+    _write(fixture_path(directory, "https://data.sec.gov/submissions/CIK{}.json".format(cik)), json.dumps({"cik": str(cik_int), "name": manager, "filings": {"recent": recent, "files": []}}))
+    return filings
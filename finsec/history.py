@@ -0,0 +1,150 @@
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .index import _cik_str, _qtr_year_code, _qtr_year_str
+
+_MANIFEST_ = "manifest.json"
+_COLUMNS_ = ("cusip", "shares", "value")
+_DEFAULT_MAX_OPEN_ = 1024
+
+
+class HoldingsHistory():
+    """Persistent, append-only columnar store of 13F holdings partitioned by quarter and CIK.
+
+    Each (quarter, CIK) partition is a directory of '.npy' column files (CUSIP, shares, value), one row per CUSIP sorted by
+    CUSIP, recorded in 'manifest.json'. Partitions are opened lazily as read-only memory maps, so a query for one CUSIP
+    binary searches each partition's CUSIP column and reads a single row, touching only the pages it needs rather than
+    loading the history into memory.
+
+    Writes never modify existing files. Adding a (quarter, CIK) that is already stored (e.g. once an amendment has been
+    applied) writes a new generation of the partition and repoints the manifest at it, 'vacuum' deletes superseded
+    generations. A single writer per directory is assumed.
+
+    At most 'max_open' partitions are kept mapped (three maps each), the least recently used are unmapped beyond that, so
+    queries across a long history of many managers stay well within the kernel's limit on memory maps per process."""
+    def __init__(self, directory:str, max_open:int = _DEFAULT_MAX_OPEN_):
+        self.directory = directory
+        self.max_open = max_open
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._columns = OrderedDict()      # Partition path -> memory mapped columns, opened on first use, least recently used first.
+        manifest_path = os.path.join(directory, _MANIFEST_)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self._manifest = json.load(f)
+        else:
+            self._manifest = {"generation": 0, "partitions": {}}
+
+    def __len__(self):
+        return len(self._manifest["partitions"])
+
+    def _write_manifest(self):
+        """Atomically replaces the manifest. Caller holds the lock."""
+        path = os.path.join(self.directory, _MANIFEST_)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self._manifest, f)
+        os.replace(path + ".tmp", path)
+
+    def add(self, cik:str, qtr_year:str, simplified_holdings_table:pd.DataFrame):
+        """Appends (or replaces) one manager's holdings for a calendar quarter."""
+        with self._lock:
+            self._add(cik, qtr_year, simplified_holdings_table)
+            self._write_manifest()
+
+    def _add(self, cik:str, qtr_year:str, simplified_holdings_table:pd.DataFrame):
+        """Writes a new partition generation and points the (in memory) manifest at it. Caller holds the lock."""
+        quarter = _qtr_year_code(qtr_year)
+        cik = _cik_str(int(cik))
+        if len(simplified_holdings_table) > 0:
+            positions = simplified_holdings_table.groupby('CUSIP', sort=False)[['Share or principal amount count', 'Holding value']].sum()
+            cusips = np.char.encode(positions.index.to_numpy(dtype=str), 'utf-8')
+        else:
+            positions = pd.DataFrame(columns=['Share or principal amount count', 'Holding value'])
+            cusips = np.array([], dtype='S1')
+        order = np.argsort(cusips, kind='stable')      # Sorted by (encoded) CUSIP for binary search.
+        columns = {"cusip": cusips[order], "shares": positions['Share or principal amount count'].to_numpy(dtype=np.int64)[order],
+                   "value": positions['Holding value'].to_numpy(dtype=np.int64)[order]}
+
+        generation = self._manifest["generation"] + 1
+        path = os.path.join("quarter={}".format(_qtr_year_str(quarter)), "cik={}".format(cik), "g{:08d}".format(generation))
+        os.makedirs(os.path.join(self.directory, path))
+        for name, values in columns.items():
+            np.save(os.path.join(self.directory, path, name + ".npy"), values)
+        self._manifest["generation"] = generation
+        self._manifest["partitions"]["{}/{}".format(_qtr_year_str(quarter), cik)] = {"quarter": quarter, "cik": cik, "rows": len(cusips), "path": path}
+
+    def add_filing(self, filing):
+        """Appends every quarter held in a 'Filing' object's filing store."""
+        self.add_store(filing.cik, filing.filings)
+
+    def add_store(self, cik:str, filings:dict):
+        """Appends every quarter held in a filing store (e.g. one loaded with 'FilingStore.load'), writing the manifest once."""
+        with self._lock:
+            for qtr_year, filing in filings.items():
+                self._add(cik, qtr_year, filing["Simplified Holdings Table"])
+            self._write_manifest()
+
+    def _open(self, partition:dict):
+        """Returns a partition's (cusip, shares, value) columns as read-only memory maps."""
+        path = partition["path"]
+        with self._lock:
+            columns = self._columns.get(path)
+            if columns is not None:
+                self._columns.move_to_end(path)
+                return columns
+        columns = tuple(np.load(os.path.join(self.directory, path, name + ".npy"), mmap_mode='r') for name in _COLUMNS_)
+        with self._lock:
+            self._columns[path] = columns
+            while len(self._columns) > self.max_open:
+                self._columns.popitem(last=False)   # Unmapped once the caller drops its references (queries only keep the scalars they read).
+        return columns
+
+    def _partitions(self, start_qtr:str = None, end_qtr:str = None):
+        start = _qtr_year_code(start_qtr) if start_qtr is not None else -1
+        end = _qtr_year_code(end_qtr) if end_qtr is not None else np.iinfo(np.int32).max
+        with self._lock:
+            partitions = list(self._manifest["partitions"].values())
+        return sorted((x for x in partitions if start <= x["quarter"] <= end and x["rows"] > 0), key=lambda x: (x["quarter"], x["cik"]))
+
+    def cusip_holdings(self, cusip:str, start_qtr:str = None, end_qtr:str = None):
+        """Returns every stored manager's shares and value of a CUSIP for each quarter in the range (inclusive, all quarters if not given)."""
+        key = cusip.encode()
+        rows = []
+        for partition in self._partitions(start_qtr, end_qtr):
+            cusips, shares, values = self._open(partition)
+            if len(key) > cusips.dtype.itemsize:
+                continue
+            i = np.searchsorted(cusips, key)
+            if i < len(cusips) and cusips[i] == key:
+                rows.append((_qtr_year_str(partition["quarter"]), partition["cik"], int(shares[i]), int(values[i])))
+        return pd.DataFrame(rows, columns=["Quarter", "CIK", "Share or principal amount count", "Holding value"])
+
+    def cusip_series(self, cusip:str, start_qtr:str = None, end_qtr:str = None):
+        """Returns a CUSIP's aggregate shares and value across all stored managers, one row per quarter in the range."""
+        holdings = self.cusip_holdings(cusip, start_qtr, end_qtr)
+        series = holdings.groupby("Quarter", sort=False).agg(**{"Holders": ("CIK", "size"), "Share or principal amount count": ("Share or principal amount count", "sum"),
+                                                               "Holding value": ("Holding value", "sum")})
+        return series   # Already in quarter order, partitions are read in quarter order.
+
+    def vacuum(self):
+        """Deletes partition generations that are no longer referenced by the manifest. Returns the number removed."""
+        with self._lock:
+            live = set(x["path"] for x in self._manifest["partitions"].values())
+            self._columns = OrderedDict((path, columns) for path, columns in self._columns.items() if path in live)
+        removed = 0
+        for quarter_dir in os.listdir(self.directory):
+            if not quarter_dir.startswith("quarter="):
+                continue
+            for cik_dir in os.listdir(os.path.join(self.directory, quarter_dir)):
+                for generation in os.listdir(os.path.join(self.directory, quarter_dir, cik_dir)):
+                    path = os.path.join(quarter_dir, cik_dir, generation)
+                    if path not in live:
+                        shutil.rmtree(os.path.join(self.directory, path))
+                        removed += 1
+        return removed
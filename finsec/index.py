@@ -0,0 +1,136 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+def _qtr_year_code(qtr_year:str):
+    """Encodes a Quarter Year string (e.g. 'Q2-2022') as a sortable integer."""
+    try:
+        qtr, year = qtr_year.upper().split("-")
+        qtr = int(qtr.lstrip("Q"))
+        year = int(year)
+    except (AttributeError, ValueError):
+        qtr = 0
+    if not 1 <= qtr <= 4:
+        raise Exception("Invalid quarter provided, expected the format 'Q2-2022'")
+    return year * 4 + qtr - 1
+
+
+def _qtr_year_str(code:int):
+    return "Q{}-{}".format(code % 4 + 1, code // 4)
+
+
+def _cik_str(cik:int):
+    return "{:010d}".format(cik)
+
+
+class HoldingsIndex():
+    """Inverted index of 13F holdings across many managers: CUSIP -> (CIK, quarter, shares, value).
+
+    Postings are held in numpy arrays sorted by (CUSIP, quarter, CIK), so every query is a binary search for the CUSIP's
+    slice followed by vectorised work on that slice only. New filings are buffered and merged into the sorted arrays on the
+    next query. Adding a (CIK, quarter) that is already indexed replaces it (e.g. once an amendment has been applied)."""
+    def __init__(self):
+        self._cusips = np.array([], dtype=str)
+        self._ciks = np.array([], dtype=np.int64)   # CIKs are held as integers, returned as 10 digit strings.
+        self._quarters = np.array([], dtype=np.int32)
+        self._shares = np.array([], dtype=np.int64)
+        self._values = np.array([], dtype=np.int64)
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            self._merge_pending()
+            return len(self._cusips)
+
+    def add(self, cik:str, qtr_year:str, simplified_holdings_table:pd.DataFrame):
+        """Adds (or replaces) one manager's holdings for a calendar quarter."""
+        quarter = _qtr_year_code(qtr_year)
+        if len(simplified_holdings_table) > 0:
+            positions = simplified_holdings_table.groupby('CUSIP', sort=False)[['Share or principal amount count', 'Holding value']].sum()
+        else:
+            positions = pd.DataFrame(columns=['Share or principal amount count', 'Holding value'])
+        with self._lock:
+            self._pending.append((int(cik), quarter, positions.index.to_numpy(dtype=str), positions['Share or principal amount count'].to_numpy(dtype=np.int64),
+                                  positions['Holding value'].to_numpy(dtype=np.int64)))
+
+    def add_filing(self, filing):
+        """Adds every quarter held in a 'Filing' object's filing store."""
+        self.add_store(filing.cik, filing.filings)
+
+    def add_store(self, cik:str, filings:dict):
+        """Adds every quarter held in a filing store (e.g. one loaded with 'FilingStore.load')."""
+        for qtr_year, filing in filings.items():
+            self.add(cik, qtr_year, filing["Simplified Holdings Table"])
+
+    def _merge_pending(self):
+        """Merges buffered filings into the sorted posting arrays. Caller holds the lock."""
+        if len(self._pending) == 0:
+            return
+        latest = {}
+        for each in self._pending:     # A later add of the same (CIK, quarter) wins.
+            latest[(each[0], each[1])] = each
+        self._pending = []
+
+        replaced = np.array([cik * 100000 + quarter for cik, quarter in latest], dtype=np.int64)
+        keep = ~np.isin(self._ciks * 100000 + self._quarters, replaced)
+
+        new = list(latest.values())
+        cusips = np.concatenate([self._cusips[keep]] + [x[2] for x in new])
+        ciks = np.concatenate([self._ciks[keep]] + [np.full(len(x[2]), x[0], dtype=np.int64) for x in new])
+        quarters = np.concatenate([self._quarters[keep]] + [np.full(len(x[2]), x[1], dtype=np.int32) for x in new])
+        shares = np.concatenate([self._shares[keep]] + [x[3] for x in new])
+        values = np.concatenate([self._values[keep]] + [x[4] for x in new])
+
+        order = np.lexsort((ciks, quarters, cusips))
+        self._cusips, self._ciks, self._quarters, self._shares, self._values = cusips[order], ciks[order], quarters[order], shares[order], values[order]
+
+    def _postings(self, cusip:str, qtr_year:str = None):
+        """Returns the (ciks, quarters, shares, values) postings for a CUSIP, optionally limited to a single quarter."""
+        with self._lock:
+            self._merge_pending()
+            start = np.searchsorted(self._cusips, cusip, side='left')
+            end = np.searchsorted(self._cusips, cusip, side='right')
+            if qtr_year is not None:
+                quarter = _qtr_year_code(qtr_year)
+                quarters = self._quarters[start:end]
+                start, end = start + np.searchsorted(quarters, quarter, side='left'), start + np.searchsorted(quarters, quarter, side='right')
+            return self._ciks[start:end], self._quarters[start:end], self._shares[start:end], self._values[start:end]
+
+    def holders(self, cusip:str, qtr_year:str = None):
+        """Returns every manager holding a CUSIP (in a quarter, or across all quarters) with their shares and value."""
+        ciks, quarters, shares, values = self._postings(cusip, qtr_year)
+        return pd.DataFrame({
+            "CIK": [_cik_str(x) for x in ciks],
+            "Quarter": [_qtr_year_str(x) for x in quarters],
+            "Share or principal amount count": shares,
+            "Holding value": values,
+        })
+
+    def top_holders(self, cusip:str, qtr_year:str, n:int = 10):
+        """Returns the 'n' largest holders of a CUSIP in a quarter by holding value, with each holder's share of the reported total."""
+        ciks, quarters, shares, values = self._postings(cusip, qtr_year)
+        order = np.argsort(-values, kind='stable')[:n]
+        total_value = values.sum()
+        return pd.DataFrame({
+            "CIK": [_cik_str(x) for x in ciks[order]],
+            "Share or principal amount count": shares[order],
+            "Holding value": values[order],
+            "Share of reported value (%)": values[order] / total_value * 100 if total_value else np.zeros(len(order)),
+        })
+
+    def concentration(self, cusip:str, qtr_year:str, n:int = 10):
+        """Returns ownership concentration statistics for a CUSIP in a quarter across the indexed managers. 'hhi' is the
+        Herfindahl-Hirschman index (0-10,000) of the holders' shares of reported value."""
+        ciks, quarters, shares, values = self._postings(cusip, qtr_year)
+        total_value = int(values.sum())
+        weights = values / total_value if total_value else np.zeros(len(values))
+        return {
+            "holders": len(ciks),
+            "total_shares": int(shares.sum()),
+            "total_value": total_value,
+            "hhi": float(((weights * 100) ** 2).sum()),
+            "top_holders_share": float(np.sort(weights)[::-1][:n].sum() * 100),    # % of reported value held by the 'n' largest holders.
+        }
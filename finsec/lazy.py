@@ -0,0 +1,26 @@
+import importlib
+import threading
+
+_IMPORT_LOCK_ = threading.Lock()
+
+
+class LazyModule():
+    """Stands in for a module that is only imported on first attribute access (e.g. 'pd = LazyModule("pandas")'), so
+    heavy dependencies such as pandas, bs4 and openpyxl are not loaded by 'import finsec' or by code paths that never
+    use them. Modules using it need 'from __future__ import annotations' so that annotations are not evaluated."""
+    def __init__(self, name:str):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            with _IMPORT_LOCK_:
+                module = self.__dict__['_module'] = importlib.import_module(self.__dict__['_name'])
+        return module
+
+    def __getattr__(self, attr:str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        return "<lazy module '{}'>".format(self.__dict__['_name'])
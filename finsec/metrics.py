@@ -0,0 +1,144 @@
+"""
+Instrumentation hooks. Listeners registered with 'add_listener' are called with an event name and a dictionary of fields
+for every HTTP request, retry, rate limit wait, cache lookup and timed processing stage. With no listeners registered
+'emit' returns immediately and 'stage' hands back a shared no-op context manager, so the overhead is a single check.
+
+Events:
+    'request'   url, status, elapsed (s), bytes, attempts
+    'retry'     url, attempt, status (None for connection errors), wait (s)
+    'rate_limit_wait'   wait (s)
+    'cache'     url, hit (bool)
+    'stage'     stage, elapsed (s) (plus any fields passed to 'stage')
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+_LISTENERS_ = []
+
+
+def add_listener(listener):
+    """Registers 'listener(event, fields)' to receive every instrumentation event. Returns the listener."""
+    _LISTENERS_.append(listener)
+    return listener
+
+
+def remove_listener(listener):
+    _LISTENERS_.remove(listener)
+
+
+def enabled():
+    return len(_LISTENERS_) > 0
+
+
+def emit(event:str, **fields):
+    if not _LISTENERS_:
+        return
+    for listener in list(_LISTENERS_):
+        listener(event, fields)
+
+
+class _NullStage():
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULL_STAGE_ = _NullStage()
+
+
+class _Stage():
+    def __init__(self, name:str, fields:dict):
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        emit('stage', stage=self.name, elapsed=time.perf_counter() - self._start, **self.fields)
+        return False
+
+
+def stage(name:str, **fields):
+    """Context manager timing a processing stage (e.g. 'parse_info_table')."""
+    if not _LISTENERS_:
+        return _NULL_STAGE_
+    return _Stage(name, fields)
+
+
+class MetricsCollector():
+    """Listener aggregating events into counters and timing totals, exportable in the Prometheus text format.
+
+        collector = finsec.add_listener(finsec.MetricsCollector())
+        ...
+        print(collector.to_prometheus())
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = defaultdict(int)          # status -> count
+            self.request_seconds = 0.0
+            self.request_bytes = 0
+            self.retries = 0
+            self.rate_limit_wait_seconds = 0.0
+            self.cache_hits = 0
+            self.cache_misses = 0
+            self.stage_counts = defaultdict(int)
+            self.stage_seconds = defaultdict(float)
+
+    def __call__(self, event:str, fields:dict):
+        with self._lock:
+            if event == 'request':
+                self.requests[fields.get('status')] += 1
+                self.request_seconds += fields.get('elapsed', 0.0)
+                self.request_bytes += fields.get('bytes', 0)
+            elif event == 'retry':
+                self.retries += 1
+            elif event == 'rate_limit_wait':
+                self.rate_limit_wait_seconds += fields.get('wait', 0.0)
+            elif event == 'cache':
+                if fields.get('hit'):
+                    self.cache_hits += 1
+                else:
+                    self.cache_misses += 1
+            elif event == 'stage':
+                self.stage_counts[fields['stage']] += 1
+                self.stage_seconds[fields['stage']] += fields.get('elapsed', 0.0)
+
+    def to_prometheus(self):
+        """Returns the collected metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines = ["# TYPE finsec_http_requests_total counter"]
+            lines += ['finsec_http_requests_total{{status="{}"}} {}'.format(status, count) for status, count in sorted(self.requests.items(), key=lambda x: str(x[0]))]
+            lines += ["# TYPE finsec_http_request_seconds_total counter", "finsec_http_request_seconds_total {}".format(self.request_seconds),
+                      "# TYPE finsec_http_response_bytes_total counter", "finsec_http_response_bytes_total {}".format(self.request_bytes),
+                      "# TYPE finsec_http_retries_total counter", "finsec_http_retries_total {}".format(self.retries),
+                      "# TYPE finsec_rate_limit_wait_seconds_total counter", "finsec_rate_limit_wait_seconds_total {}".format(self.rate_limit_wait_seconds),
+                      "# TYPE finsec_cache_hits_total counter", "finsec_cache_hits_total {}".format(self.cache_hits),
+                      "# TYPE finsec_cache_misses_total counter", "finsec_cache_misses_total {}".format(self.cache_misses),
+                      "# TYPE finsec_stage_seconds_total counter"]
+            lines += ['finsec_stage_seconds_total{{stage="{}"}} {}'.format(name, seconds) for name, seconds in sorted(self.stage_seconds.items())]
+            lines += ["# TYPE finsec_stage_runs_total counter"]
+            lines += ['finsec_stage_runs_total{{stage="{}"}} {}'.format(name, count) for name, count in sorted(self.stage_counts.items())]
+        return "\n".join(lines) + "\n"
+
+
+class LogListener():
+    """Listener writing each event as a single line of JSON to a 'logging' logger (default 'finsec.metrics', DEBUG level)."""
+    def __init__(self, logger:logging.Logger = None, level:int = logging.DEBUG):
+        self.logger = logger if logger is not None else logging.getLogger('finsec.metrics')
+        self.level = level
+
+    def __call__(self, event:str, fields:dict):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, json.dumps(dict(fields, event=event), default=str))
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import re
+from array import array
+from datetime import datetime
+from io import BytesIO
+
+from lxml import etree
+
+from . import metrics
+from .lazy import LazyModule
+
+bs4 = LazyModule("bs4")
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+_PARSER_ENGINES_ = ('lxml', 'bs4')
+
+_HOLDINGS_COLUMNS_ = [
+    "Name of issuer",
+    "Title of class",
+    "CUSIP",
+    "Holding value",
+    "Share or principal type",
+    "Share or principal amount count",
+    "Put or call",
+    "Investment discretion",
+    "Other manager",
+    "Voting authority sole count",
+    "Voting authority shared count",
+    "Voting authority none count",
+]
+_SIMPLIFIED_COLUMNS_ = ['Name of issuer', 'Title of class', 'CUSIP', 'Share or principal type', 'Put or call', 'Holding value', 'Share or principal amount count']
+
+# Complete submission text file (SGML) markup.
+_SUBMISSION_DOCUMENT_RE_ = re.compile(rb'<DOCUMENT>(.*?)</DOCUMENT>', re.S)
+_SUBMISSION_TYPE_RE_ = re.compile(rb'<TYPE>([^\r\n<]+)')
+_SUBMISSION_FILENAME_RE_ = re.compile(rb'<FILENAME>([^\r\n<]+)')
+_SUBMISSION_TEXT_RE_ = re.compile(rb'<TEXT>(.*?)</TEXT>', re.S)
+_SUBMISSION_XML_RE_ = re.compile(rb'<XML>(.*)</XML>', re.S)
+
+# Info table element (local name) -> holdings table column. Elements are matched on their local name so that both prefixed
+# (e.g. 'ns1:infoTable') and default namespace documents are handled.
+_TEXT_ELEMENTS_ = {
+    "nameOfIssuer": "Name of issuer",
+    "titleOfClass": "Title of class",
+    "cusip": "CUSIP",
+    "sshPrnamtType": "Share or principal type",
+    "investmentDiscretion": "Investment discretion",
+    "otherManager": "Other manager",
+}
+_INT_ELEMENTS_ = {
+    "value": "Holding value",
+    "sshPrnamt": "Share or principal amount count",
+    "Sole": "Voting authority sole count",
+    "Shared": "Voting authority shared count",
+    "None": "Voting authority none count",
+}
+
+
+def validate_parser(parser:str):
+    """Check the requested parser engine is supported."""
+    if parser not in _PARSER_ENGINES_:
+        raise Exception("Invalid parser provided, expected one of {}".format(", ".join(_PARSER_ENGINES_)))
+    return parser
+
+
+def get_dollar_value_multiplier(date:str, primary_html_doc=None):
+    """Returns the multiplier that converts a filing's reported values to dollars. Values were reported in thousands of dollars until the rule change to the nearest dollar in 2023 (reference: https://www.sec.gov/info/edgar/specifications/form13fxmltechspec).
+    For 2023 filings the rendered primary document is checked for 'nearest dollar', without one the rule's effective date (2023-01-03) is used."""
+    datetime_obj = datetime.strptime(date, '%Y-%m-%d')
+    if datetime_obj.year < 2023:
+        return 1000
+    elif datetime_obj.year > 2023:
+        return 1
+    elif primary_html_doc is not None:
+        temp_list = primary_html_doc.findAll(text=re.compile('nearest dollar'))
+        return 1 if len(temp_list)>0 else 1000
+    return 1 if datetime_obj >= datetime(2023, 1, 3) else 1000
+
+
+def _get_bs4_text(bs4_obj):
+    try:
+        return bs4_obj.text
+    except:
+        return "N/A"
+
+
+def simplify_holdings_table(holdings_table:pd.DataFrame):
+    """Collapses the holdings table down to one row per security (i.e. removes the split across investment managers)."""
+    holdings_table_dropped_na = holdings_table[_SIMPLIFIED_COLUMNS_].dropna(axis=1)
+    return holdings_table_dropped_na.groupby(holdings_table_dropped_na.columns[:-2].to_list(), sort=False, as_index=False).sum()
+
+
+class Holdings():
+    """Compact, columnar 13F holdings as read from an information table: text columns are lists of strings and integer
+    columns are typed 'array("q")' buffers, rather than a dictionary per holding. Holding values are in dollars.
+    Neither numpy nor pandas is needed until 'to_pandas' is called."""
+    __slots__ = ('text_columns', 'int_columns')
+
+    def __init__(self):
+        self.text_columns = {column: [] for column in _TEXT_ELEMENTS_.values()}
+        self.int_columns = {column: array('q') for column in _INT_ELEMENTS_.values()}
+
+    def __len__(self):
+        return len(self.int_columns["Holding value"])
+
+    def append(self, text_values:dict, int_values:dict):
+        """Adds a holding, text columns missing from 'text_values' are recorded as 'N/A'."""
+        for column, values in self.text_columns.items():
+            values.append(text_values.get(column, "N/A"))
+        for column, values in self.int_columns.items():
+            values.append(int_values[column])
+
+    def _scale_values(self, dollar_value_multiplier:int):
+        if dollar_value_multiplier != 1:
+            self.int_columns["Holding value"] = array('q', [x * dollar_value_multiplier for x in self.int_columns["Holding value"]])
+
+    def to_pandas(self):
+        """Returns the holdings table as a DataFrame."""
+        count = len(self)
+        if count == 0:
+            return pd.DataFrame()
+        data = {}
+        for column in _HOLDINGS_COLUMNS_:
+            if column == "Put or call":
+                data[column] = [None] * count
+            elif column in self.int_columns:
+                data[column] = np.frombuffer(self.int_columns[column], dtype=np.int64)
+            else:
+                data[column] = self.text_columns[column]
+        return pd.DataFrame(data)
+
+
+def parse_holdings_bs4(content, dollar_value_multiplier:int):
+    """Parses the 13F information table by loading the full document into BeautifulSoup. Returns 'Holdings'."""
+    list_doc = bs4.BeautifulSoup(content, "xml")
+    holdings = Holdings()
+    for each_holding in list_doc.find_all("infoTable"):
+        holdings.append({column: _get_bs4_text(each_holding.find(element)) for element, column in _TEXT_ELEMENTS_.items()},
+                        {column: int(each_holding.find(element).text) for element, column in _INT_ELEMENTS_.items()})
+    holdings._scale_values(dollar_value_multiplier)
+    return holdings
+
+
+def parse_holdings_lxml(content:bytes, dollar_value_multiplier:int):
+    """Parses the 13F information table incrementally with lxml's iterparse. Returns 'Holdings'.
+
+    Each 'infoTable' element's values are appended straight onto the typed column buffers (text columns it lacks are
+    filled with 'N/A' once the row ends) and the element is then freed, so memory use is bounded by the output columns
+    rather than the document tree."""
+    holdings = Holdings()
+    buffers = {tag: (holdings.text_columns[column], False) for tag, column in _TEXT_ELEMENTS_.items()}   # Local name -> (column buffer, integer column).
+    buffers.update({tag: (holdings.int_columns[column], True) for tag, column in _INT_ELEMENTS_.items()})
+    row = 0
+    for _, each_holding in etree.iterparse(BytesIO(content), events=("end",), tag="{*}infoTable", resolve_entities=False, huge_tree=True):
+        for element in each_holding.iter():
+            tag = element.tag
+            if not isinstance(tag, str):    # Skip comments and processing instructions.
+                continue
+            buffer = buffers.get(tag[tag.rfind('}') + 1:])
+            if buffer is None:
+                continue
+            values, is_int = buffer
+            value = int(element.text) if is_int else (element.text or "")
+            if len(values) > row:   # Repeated element, the last one is kept.
+                values[row] = value
+            else:
+                values.append(value)
+        row += 1
+        for values in holdings.text_columns.values():
+            if len(values) < row:
+                values.append("N/A")
+        for column, values in holdings.int_columns.items():
+            if len(values) < row:
+                raise Exception("Information table entry {} has no '{}' value".format(row, column))
+
+        # Free the element (and any already processed siblings) now that it has been read.
+        each_holding.clear()
+        while each_holding.getprevious() is not None:
+            del each_holding.getparent()[0]
+    holdings._scale_values(dollar_value_multiplier)
+    return holdings
+
+
+def parse_holdings(content:bytes, dollar_value_multiplier:int, parser:str = 'lxml'):
+    """Parses the 13F information table XML using the selected parser engine. Returns compact 'Holdings', without loading pandas."""
+    if parser == 'lxml':
+        return parse_holdings_lxml(content, dollar_value_multiplier)
+    return parse_holdings_bs4(content, dollar_value_multiplier)
+
+
+def parse_info_table(content:bytes, dollar_value_multiplier:int, parser:str = 'lxml'):
+    """Parses the 13F information table XML using the selected parser engine. Returns the holdings table."""
+    return parse_holdings(content, dollar_value_multiplier, parser).to_pandas()
+
+
+def parse_cover_page(content, dollar_value_multiplier:int):
+    """Parses the 13F primary document XML. Returns the filing cover page dictionary."""
+    primary_doc = bs4.BeautifulSoup(content, "xml")
+    filing_manager = _get_bs4_text(primary_doc.find("filingManager").find("name"))
+    business_address = _get_bs4_text(primary_doc.find("street1")) + ", " + _get_bs4_text(primary_doc.find("city")) + ", " + _get_bs4_text(primary_doc.find("stateOrCountry")) + ", " + _get_bs4_text(primary_doc.find("zipCode"))
+    submission_type = _get_bs4_text(primary_doc.find("submissionType"))
+    period_of_report = _get_bs4_text(primary_doc.find("periodOfReport"))
+
+    if _get_bs4_text(primary_doc.find("amendmentInfo")) != 'N/A':  # Check if it is an amendment type filing.
+        amendment_type = _get_bs4_text(primary_doc.find("amendmentInfo").find("amendmentType"))
+    else:
+        amendment_type = 'N/A'
+
+    signature_block = primary_doc.find("signatureBlock")
+    return {
+        "filing_manager":filing_manager,
+        "business_address":business_address,
+        "submission_type":submission_type,
+        "period_of_report":period_of_report,
+        "signature_name":_get_bs4_text(signature_block.find("name")),
+        "signature_title":_get_bs4_text(signature_block.find("title")),
+        "signature_phone":_get_bs4_text(signature_block.find("phone")),
+        "signature_city":_get_bs4_text(signature_block.find("city")),
+        "signature_state":_get_bs4_text(signature_block.find("stateOrCountry")),
+        "signature_date":_get_bs4_text(signature_block.find("signatureDate")),
+        "amendment_type":amendment_type,
+        "portfolio_value":int(_get_bs4_text(primary_doc.find("summaryPage").find("tableValueTotal"))) * dollar_value_multiplier,
+        "count_holdings":int(_get_bs4_text(primary_doc.find("summaryPage").find("tableEntryTotal"))),
+        "filing_amended":False                  # Used to record if this instance of the filing has been amended in any way.
+    }
+
+
+def needs_primary_html(date:str):
+    """True if the rendered primary document is required to work out a filing's dollar value multiplier (i.e. it was filed in 2023)."""
+    return date[:4] == "2023"
+
+
+def parse_13f_documents(primary_document:bytes, info_table:bytes, date:str, primary_html_document:bytes = None, parser:str = 'lxml'):
+    """Parses the documents of a single 13F filing, without any network requests. 'primary_html_document' (the rendered
+    primary document) is only used for filings made in 2023, see 'get_dollar_value_multiplier'.
+    Returns the cover page, holdings table and simplified holdings table."""
+    primary_html_doc = None
+    if primary_html_document is not None and needs_primary_html(date):
+        primary_html_doc = bs4.BeautifulSoup(primary_html_document, "xml")
+    # Check if the documentation is to the nearest dollar or thousand dollars. This new reporting rule came into effect in 2023 (reference: https://www.sec.gov/info/edgar/specifications/form13fxmltechspec)
+    dollar_value_multiplier = get_dollar_value_multiplier(date, primary_html_doc)
+
+    with metrics.stage('parse_cover_page'):
+        cover_page = parse_cover_page(primary_document, dollar_value_multiplier)
+    with metrics.stage('parse_info_table', parser=parser, bytes=len(info_table)):
+        holdings_table = parse_info_table(info_table, dollar_value_multiplier, parser)
+    with metrics.stage('simplify_holdings_table', rows=len(holdings_table)):
+        simplified_holdings_table = simplify_holdings_table(holdings_table)
+    return cover_page, holdings_table, simplified_holdings_table
+
+
+def split_submission_text(content:bytes):
+    """Splits an EDGAR complete submission text file (<accession>.txt) into its embedded documents.
+    Returns a list of (type, filename, document) tuples, XML documents are returned without their <XML> wrapper."""
+    documents = []
+    for match in _SUBMISSION_DOCUMENT_RE_.finditer(content):
+        block = match.group(1)
+        doc_type = _SUBMISSION_TYPE_RE_.search(block)
+        filename = _SUBMISSION_FILENAME_RE_.search(block)
+        text = _SUBMISSION_TEXT_RE_.search(block)
+        if doc_type is None or text is None:
+            continue
+        document = text.group(1).strip()
+        xml = _SUBMISSION_XML_RE_.fullmatch(document)
+        if xml is not None:
+            document = xml.group(1).strip()
+        documents.append((doc_type.group(1).strip().decode(), filename.group(1).strip().decode() if filename else None, document))
+    return documents
@@ -0,0 +1,163 @@
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from .base import merge_amendment
+from .batch import FilingBatch
+from .parsers import parse_13f_documents
+
+_DEFAULT_IO_WORKERS_ = 8
+_DEFAULT_MAX_PENDING_ = 32
+_PUT_TIMEOUT_ = 0.1
+
+
+def _to_columns(table:pd.DataFrame):
+    """Converts a table to {column: numpy array}, which pickles far more compactly than a DataFrame."""
+    return {column: table[column].to_numpy() for column in table.columns}
+
+
+def _parse_filing(documents:list, parser:str, amend_filing:bool):
+    """Runs in a worker process. Parses a 13F-HR and its 13F-HR/A amendments (a list of (primary document, information
+    table, rendered primary document, filing date) tuples, oldest first) and merges the amendments into the filing.
+    Returns the cover page and the holdings and simplified holdings tables as columns."""
+    primary_document, info_table, primary_html_document, date = documents[0]
+    cover_page, holdings_table, simplified_holdings_table = parse_13f_documents(primary_document, info_table, date, primary_html_document, parser)
+    if amend_filing:
+        for primary_document, info_table, primary_html_document, date in documents[1:]:
+            cover_page, holdings_table, simplified_holdings_table = merge_amendment(cover_page, holdings_table, simplified_holdings_table,
+                                                                                    *parse_13f_documents(primary_document, info_table, date, primary_html_document, parser))
+    return cover_page, _to_columns(holdings_table), _to_columns(simplified_holdings_table)
+
+
+class FilingPipeline(FilingBatch):
+    """Backfills 13F filings for many CIKs and quarters using every core.
+
+    Threads ('io_workers') fetch the raw documents of each filing (and its amendments) into a bounded queue, and a pool
+    of 'parse_workers' processes parses them and aggregates the simplified holdings table, so parsing is not limited
+    by the GIL. At most 'max_pending' filings are held waiting to be parsed, and at most 'max_pending' more are being
+    parsed, so memory stays bounded however far the downloads get ahead. 'progress(cik, qtr_year, completed, total)'
+    is called as each filing finishes.
+
+    Failures are recorded in 'errors', keyed by CIK (listing failures) or by (CIK, Quarter Year) (filing failures). The
+    worker processes are spawned, so a script calling 'run' must do so under 'if __name__ == "__main__":'."""
+    def __init__(self, ciks, declared_user=None, io_workers:int = _DEFAULT_IO_WORKERS_, parse_workers:int = None, max_pending:int = _DEFAULT_MAX_PENDING_,
+                 progress=None, **filing_kwargs):
+        super().__init__(ciks, declared_user=declared_user, max_workers=io_workers, **filing_kwargs)
+        self.parse_workers = parse_workers if parse_workers is not None else os.cpu_count()
+        self.max_pending = max_pending
+        self.progress = progress
+
+    def _plan(self, start_qtr:str, end_qtr:str, amend_filing:bool):
+        """Reads each CIK's listing. Returns the (cik, qtr_year, [(url, filing date), ...]) filings still to be fetched, original filing first."""
+        def _filing_tasks(filing):
+            start_key, end_key = filing._qtr_year_key(start_qtr), filing._qtr_year_key(end_qtr)
+            filing._get_all_13f_filings_url()
+            chains = filing._13f_amendment_chains_index() if amend_filing and len(filing._13f_amendment_filings) > 0 else {}
+            return [(filing.cik, qtr_year, [original] + chains.get(qtr_year, [])) for qtr_year, original in filing._13f_index().items()
+                    if start_key <= filing._qtr_year_key(qtr_year) <= end_key and qtr_year not in filing.filings]
+        return [task for tasks in self._run(_filing_tasks).values() for task in tasks]
+
+    def _store(self, cik:str, qtr_year:str, cover_page:dict, holdings_columns:dict, simplified_columns:dict, amend_filing:bool):
+        filing = self.filings[cik]
+        simplified_holdings_table = pd.DataFrame(simplified_columns)
+        filing.filings[qtr_year] = {
+            "Cover Page":cover_page,
+            "Period of Report":cover_page['period_of_report'],
+            "Holdings Table":pd.DataFrame(holdings_columns),
+            "Simplified Holdings Table":simplified_holdings_table,
+            "Fund Value":cover_page['portfolio_value'],
+            "Holdings Count":cover_page['count_holdings'],
+            "Simplified Holdings Count":len(simplified_holdings_table),
+            "Latest 13F":qtr_year == filing._latest_13f_qtr_year,
+            "Amended Filing":amend_filing,
+        }
+        if filing.manager is None:
+            filing.manager = cover_page['filing_manager']
+        if filing._history is not None:
+            filing._history.add(cik, qtr_year, simplified_holdings_table)
+
+    def run(self, start_qtr:str, end_qtr:str, simplified:bool = True, amend_filing:bool = True):
+        """Fetches and parses every 13F-HR filing between two calendar quarters (inclusive) for every CIK. Returns the
+        holdings in a single DataFrame indexed by CIK and quarter, the filings are also kept in each 'Filing' object's store."""
+        tasks = self._plan(start_qtr, end_qtr, amend_filing)
+        total = len(tasks)
+        fetched = queue.Queue(maxsize=self.max_pending)    # Backpressure, fetch threads block once the parsers fall behind.
+        stop = threading.Event()    # Set if the run fails, so fetch threads stop rather than block forever on a full queue.
+
+        def _put(item):
+            while not stop.is_set():
+                try:
+                    fetched.put(item, timeout=_PUT_TIMEOUT_)
+                    return
+                except queue.Full:
+                    pass
+
+        def _fetch(task):
+            if stop.is_set():
+                return
+            cik, qtr_year, filings = task
+            try:
+                documents = [self.filings[cik]._fetch_13f_documents(url, date) + (date,) for url, date in filings]
+                _put((cik, qtr_year, documents, None))
+            except Exception as e:
+                _put((cik, qtr_year, None, e))
+
+        completed = 0
+        def _done(cik, qtr_year, error=None):
+            nonlocal completed
+            completed += 1
+            if error is not None:
+                self.errors[(cik, qtr_year)] = error
+            if self.progress is not None:
+                self.progress(cik, qtr_year, completed, total)
+
+        def _collect(futures):
+            for future in futures:
+                cik, qtr_year = parsing.pop(future)
+                try:
+                    self._store(cik, qtr_year, *future.result(), amend_filing)
+                    _done(cik, qtr_year)
+                except Exception as e:
+                    _done(cik, qtr_year, e)
+
+        parsing = {}
+        # Worker processes are spawned rather than forked, as the fetch threads are already running.
+        with ThreadPoolExecutor(max_workers=self.max_workers) as io_executor, \
+             ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=multiprocessing.get_context('spawn')) as parse_executor:
+            for task in tasks:
+                io_executor.submit(_fetch, task)
+            try:
+                received = 0
+                while received < total or len(parsing) > 0:
+                    _collect([future for future in parsing if future.done()])
+                    if received < total and len(parsing) < self.max_pending:
+                        cik, qtr_year, documents, error = fetched.get()
+                        received += 1
+                        if error is not None:
+                            _done(cik, qtr_year, error)
+                        else:
+                            parsing[parse_executor.submit(_parse_filing, documents, self.filings[cik].parser, amend_filing)] = (cik, qtr_year)
+                    elif len(parsing) > 0:
+                        _collect(wait(parsing, return_when=FIRST_COMPLETED).done)
+            except BaseException:
+                # E.g. a broken process pool or a failing 'progress' callback. Stop the fetch threads and drop the
+                # filings not yet parsed, so leaving the executors does not wait on them.
+                stop.set()
+                io_executor.shutdown(wait=False, cancel_futures=True)
+                for future in parsing:
+                    future.cancel()
+                raise
+
+        table_type = "Simplified Holdings Table" if simplified else "Holdings Table"
+        tables = {}
+        for cik, filing in self.filings.items():
+            start_key, end_key = filing._qtr_year_key(start_qtr), filing._qtr_year_key(end_qtr)
+            for qtr_year in sorted((x for x in filing.filings if start_key <= filing._qtr_year_key(x) <= end_key), key=filing._qtr_year_key):
+                tables[(cik, qtr_year)] = filing.filings[qtr_year][table_type]
+        if len(tables) == 0:
+            return pd.DataFrame()
+        return pd.concat(tables.values(), keys=list(tables.keys()), names=['CIK', 'Quarter', None])
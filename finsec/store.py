@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import pickle
+
+from .lazy import LazyModule
+
+pd = LazyModule("pandas")
+
+_TABLE_KEYS_ = ("Holdings Table", "Simplified Holdings Table")
+
+
+class FilingStore(dict):
+    """In-memory store of the filings looked at so far, keyed by calendar Quarter Year (e.g. 'Q2-2022').
+
+    Each entry is a dictionary holding the cover page, summary values and the holdings tables as DataFrames, so a lookup
+    returns the stored tables directly (dtypes intact, e.g. CUSIP leading zeros) without any reparsing."""
+
+    def save(self, path:str):
+        """Writes the store to disk (pickle protocol 5), preserving DataFrame dtypes. Only load files you trust."""
+        with open(path, 'wb') as f:
+            pickle.dump(dict(self), f, protocol=5)
+
+    @classmethod
+    def load(cls, path:str):
+        """Reads a store written by 'save'."""
+        with open(path, 'rb') as f:
+            return cls(pickle.load(f))
+
+    def to_json_dict(self):
+        """Returns the store in the legacy layout, with each holdings table serialised by 'DataFrame.to_json()'."""
+        output = {}
+        for qtr_year, filing in self.items():
+            output[qtr_year] = {key: (value.to_json() if key in _TABLE_KEYS_ and isinstance(value, pd.DataFrame) else value) for key, value in filing.items()}
+        return output
@@ -0,0 +1,118 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_ACCEPT_ENCODING
+
+from . import metrics
+
+_SEC_MAX_REQUESTS_PER_SECOND_ = 10     # SEC fair access policy (reference: https://www.sec.gov/os/accessing-edgar-data)
+_RETRY_STATUS_CODES_ = (429, 500, 502, 503, 504)
+
+
+class RateLimiter():
+    """Thread-safe token bucket limiter. A single limiter shared by many transports keeps their combined request rate
+    within 'rate' requests per second. 'burst' is the bucket size, keep this small so short windows also respect the limit."""
+    def __init__(self, rate:float = _SEC_MAX_REQUESTS_PER_SECOND_, burst:int = 1):
+        if rate <= 0:
+            raise Exception("Invalid rate provided, rate must be greater than zero")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes a token from the bucket, sleeping until one is available. Returns the time spent waiting (seconds)."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1   # Reserve the token now, callers queue up behind each other by going into 'debt'.
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class Transport():
+    """HTTP transport used for every request made to EDGAR.
+
+    Requests are sent over a keep-alive connection pool, throttled by a (shared) rate limiter and retried with
+    exponential backoff on 429/5xx responses and connection errors. gzip/deflate responses are decoded transparently.
+    Subclass and override 'get' to plug in an alternative transport."""
+    def __init__(self, rate_limiter:RateLimiter = None, max_retries:int = 3, backoff_factor:float = 0.5, pool_maxsize:int = 10, timeout:float = 30):
+        self.rate_limiter = rate_limiter if rate_limiter is not None else _DEFAULT_RATE_LIMITER_
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({'Accept-Encoding': DEFAULT_ACCEPT_ENCODING})
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _backoff(self, attempt:int, response=None):
+        """Seconds to wait before the next attempt, honouring any 'Retry-After' header sent by the server."""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        return self.backoff_factor * (2 ** attempt)
+
+    def get(self, url:str, headers:dict = None):
+        """Sends a GET request, returns the 'requests.Response'. Raises 'requests.HTTPError' for unsuccessful responses
+        once retries have been exhausted."""
+        for attempt in range(self.max_retries + 1):
+            wait = self.rate_limiter.acquire()
+            if wait > 0:
+                metrics.emit('rate_limit_wait', wait=wait)
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                backoff = self._backoff(attempt)
+                metrics.emit('retry', url=url, attempt=attempt + 1, status=None, wait=backoff)
+                time.sleep(backoff)
+                continue
+            if response.status_code in _RETRY_STATUS_CODES_ and attempt < self.max_retries:
+                backoff = self._backoff(attempt, response)
+                metrics.emit('retry', url=url, attempt=attempt + 1, status=response.status_code, wait=backoff)
+                time.sleep(backoff)
+                continue
+            metrics.emit('request', url=url, status=response.status_code, elapsed=time.perf_counter() - start, bytes=len(response.content), attempts=attempt + 1)
+            response.raise_for_status()
+            return response
+
+    def close(self):
+        self.session.close()
+
+
+_DEFAULT_RATE_LIMITER_ = RateLimiter()
+_DEFAULT_TRANSPORT_ = None
+_DEFAULT_TRANSPORT_LOCK_ = threading.Lock()
+
+
+def get_default_transport():
+    """Returns the transport shared by all 'Filing' instances that have not been given their own."""
+    global _DEFAULT_TRANSPORT_
+    with _DEFAULT_TRANSPORT_LOCK_:
+        if _DEFAULT_TRANSPORT_ is None:
+            _DEFAULT_TRANSPORT_ = Transport()
+        return _DEFAULT_TRANSPORT_
+
+
+def set_default_transport(transport:Transport):
+    """Replaces the transport shared by all 'Filing' instances that have not been given their own."""
+    global _DEFAULT_TRANSPORT_
+    with _DEFAULT_TRANSPORT_LOCK_:
+        _DEFAULT_TRANSPORT_ = transport
@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+
+from .base import _13F_FORMS_, _FILING_INDEX_URL_, _SUBMISSIONS_URL_, merge_amendment
+from .batch import FilingBatch
+
+_DEFAULT_INTERVAL_ = 60.0
+
+
+class FilingWatcher(FilingBatch):
+    """Polls managers for new 13F-HR and 13F-HR/A filings.
+
+    Each poll sends a conditional GET (If-None-Match / If-Modified-Since) for every CIK's EDGAR submissions feed, so an
+    unchanged feed costs a single '304 Not Modified' response. When the feed has changed, only the 13F accessions not yet
+    seen for that CIK (usually those above the last seen accession) are fetched and parsed. A new 13F-HR adds its quarter
+    to the filing store. A new 13F-HR/A is merged into its quarter only: if that quarter is already stored, the one new
+    amendment is applied to it. Otherwise the quarter is fetched with all of its amendments.
+
+    Every new filing is delivered as an event dictionary (cik, accession, form, filing_date, qtr_year, cover_page,
+    holdings_table, simplified_holdings_table) to 'callback' (if given) and returned by 'poll'. The first poll of a CIK
+    only records the accessions already filed, unless 'include_existing'. Per CIK state (seen accessions, ETag and
+    Last-Modified) is kept in memory and written to 'state_path' (if given) so a restarted watcher carries on where it
+    left off."""
+    def __init__(self, ciks, declared_user=None, callback=None, state_path:str = None, include_existing:bool = False, max_workers:int = 8, **filing_kwargs):
+        super().__init__(ciks, declared_user=declared_user, max_workers=max_workers, **filing_kwargs)
+        self.callback = callback
+        self.state_path = state_path
+        self.include_existing = include_existing
+        self.state = {}     # CIK -> {"accessions": 13F accessions seen in the feed (newest first), "etag": ..., "last_modified": ...}
+        if state_path is not None and os.path.exists(state_path):
+            with open(state_path) as f:
+                self.state = json.load(f)
+
+    def _save_state(self):
+        with open(self.state_path + ".tmp", "w") as f:
+            json.dump(self.state, f)
+        os.replace(self.state_path + ".tmp", self.state_path)
+
+    def _store(self, filing, qtr_year:str, cover_page:dict, holdings_table, simplified_holdings_table):
+        record = filing.filings[qtr_year]
+        record.update({
+            "Cover Page":cover_page,
+            "Period of Report":cover_page['period_of_report'],
+            "Holdings Table":holdings_table,
+            "Simplified Holdings Table":simplified_holdings_table,
+            "Fund Value":cover_page['portfolio_value'],
+            "Holdings Count":cover_page['count_holdings'],
+            "Simplified Holdings Count":len(simplified_holdings_table),
+        })
+        if filing._history is not None:
+            filing._history.add(filing.cik, qtr_year, simplified_holdings_table)
+
+    def _fetch_quarter(self, filing, qtr_year:str, applied:set):
+        """Fetches a quarter's 13F-HR with every amendment in the listing, recording the amendments applied."""
+        filing.filings.pop(qtr_year, None)     # A new original replaces whatever was stored for the quarter.
+        tables = filing.get_13f_filing(qtr_year)
+        if len(filing._13f_amendment_filings) > 0:
+            applied.update(url for url, filing_date in filing._13f_amendment_chains_index().get(qtr_year, []))
+        return tables
+
+    def _new_filing(self, filing, accession:str, form:str, filing_date:str, report_date:str, applied:set):
+        """Fetches and parses a new accession into the filing store. Returns its event. 'applied' holds the urls of the
+        amendments already merged during this poll, so an amendment found with its original is not applied twice."""
+        url = _FILING_INDEX_URL_.format(int(filing.cik), accession.replace('-', ''), accession)
+        if form == "13F-HR":
+            qtr_year = filing._qtr_year(report_date) if report_date else filing._recent_qtr_year(filing_date)
+            cover_page, holdings_table, simplified_holdings_table = self._fetch_quarter(filing, qtr_year, applied)
+        else:
+            qtr_year = filing._qtr_year(report_date or filing._amendment_period_of_report(url))
+            if url in applied:      # Already merged when its quarter was fetched.
+                record = filing.filings[qtr_year]
+                cover_page, holdings_table, simplified_holdings_table = record["Cover Page"], record["Holdings Table"], record["Simplified Holdings Table"]
+            elif qtr_year in filing.filings:     # Apply just this amendment to the stored quarter.
+                record = filing.filings[qtr_year]
+                cover_page, holdings_table, simplified_holdings_table = merge_amendment(record["Cover Page"], record["Holdings Table"], record["Simplified Holdings Table"],
+                                                                                        *filing._parse_13f_url(url, filing_date))
+                self._store(filing, qtr_year, cover_page, holdings_table, simplified_holdings_table)
+                applied.add(url)
+            else:
+                cover_page, holdings_table, simplified_holdings_table = self._fetch_quarter(filing, qtr_year, applied)
+        return {"cik": filing.cik, "accession": accession, "form": form, "filing_date": filing_date, "qtr_year": qtr_year, "cover_page": cover_page,
+                "holdings_table": holdings_table, "simplified_holdings_table": simplified_holdings_table}
+
+    def _poll_filing(self, filing):
+        """Polls a single CIK. Returns the events of its new filings, oldest first."""
+        state = dict(self.state.get(filing.cik, {}))
+        headers = dict(filing._headers)
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+        # Not read through the document cache, the feed must be revalidated with EDGAR on every poll.
+        response = filing._transport.get(_SUBMISSIONS_URL_.format("CIK{}.json".format(filing.cik)), headers=headers)
+        if response.status_code == 304:
+            return []
+
+        submissions = json.loads(response.content)
+        recent = submissions['filings']['recent']
+        filings_13f = [x for x in zip(recent['accessionNumber'], recent['form'], recent['filingDate'], recent['reportDate']) if x[1] in _13F_FORMS_]   # Newest first.
+        seen = set(state.get("accessions", []))
+        new = [x for x in filings_13f if x[0] not in seen]     # Not just those above the last seen, filings can be disseminated out of order.
+        baseline = "accessions" not in state and not self.include_existing
+
+        events = []
+        if len(new) > 0:
+            filing._set_13f_listing([recent], complete=len(submissions['filings'].get('files', [])) == 0)
+            filing._13f_index()
+            for qtr_year, record in filing.filings.items():
+                record["Latest 13F"] = qtr_year == filing._latest_13f_qtr_year
+            if not baseline:
+                applied = set()
+                for accession, form, filing_date, report_date in sorted(new, key=lambda x: x[2]):
+                    events.append(self._new_filing(filing, accession, form, filing_date, report_date, applied))
+        state["accessions"] = [x[0] for x in filings_13f]     # Accessions that have dropped out of the feed cannot reappear.
+        # Only recorded once every new filing has been processed, so a failure is retried on the next poll.
+        state["etag"] = response.headers.get("ETag")
+        state["last_modified"] = response.headers.get("Last-Modified")
+        self.state[filing.cik] = state
+        return events
+
+    def poll(self):
+        """Checks every CIK once. Returns the events of the new filings found (also passed to 'callback'), failures are recorded in 'errors'."""
+        results = self._run(self._poll_filing)
+        if self.state_path is not None:
+            self._save_state()
+        events = [event for cik in self.ciks for event in results.get(cik, [])]
+        if self.callback is not None:
+            for event in events:
+                self.callback(event)
+        return events
+
+    def watch(self, interval:float = _DEFAULT_INTERVAL_, stop_event:threading.Event = None, max_polls:int = None):
+        """Polls every 'interval' seconds until 'stop_event' is set (or 'max_polls' polls have been made)."""
+        polls = 0
+        while stop_event is None or not stop_event.is_set():
+            self.poll()
+            polls += 1
+            if max_polls is not None and polls >= max_polls:
+                break
+            if stop_event is not None:
+                stop_event.wait(interval)
+            else:
+                time.sleep(interval)
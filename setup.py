@@ -48,6 +48,7 @@ setuptools.setup(
                         'lxml>=4.8.0',
                         'openpyxl>=3.0.9',
                         ],
+    extras_require={'parquet': ['pyarrow>=10.0.0']},
 
     packages=["finsec"]
     # entry_points={
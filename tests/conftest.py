@@ -0,0 +1,18 @@
+"""
+Shared test fixtures: a local EDGAR fixture server serving synthetic managers
+"""
+
+import pytest
+from finsec.fixtures import FixtureServer, write_synthetic_manager
+
+
+@pytest.fixture(scope="class")
+def edgar(request, tmp_path_factory):
+    """Writes the synthetic managers listed in the test class' 'managers' attribute ('write_synthetic_manager' keyword
+    arguments) to a temporary directory and serves it from a local fixture server for the class' tests. Sets
+    'directory', 'written' (the filings written for each manager) and 'server' on the class."""
+    directory = str(tmp_path_factory.mktemp("edgar"))
+    written = [write_synthetic_manager(directory, **kwargs) for kwargs in request.cls.managers]
+    with FixtureServer(directory) as server:
+        request.cls.directory, request.cls.written, request.cls.server = directory, written, server
+        yield server
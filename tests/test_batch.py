@@ -0,0 +1,24 @@
+"""
+Tests for concurrent multi-CIK batch fetching
+"""
+
+import pandas as pd
+import finsec
+import finsec.batch
+
+
+class _StubFiling(finsec.Filing):
+    def latest_13f_filing(self, simplified=True, amend_filing=True):
+        if self.cik == "0000000002":
+            raise Exception("No filings found")
+        return pd.DataFrame({"CUSIP": ["00507V109"], "Holding value": [int(self.cik)]})
+
+
+class Test:
+    def test_latest_13f_filings(self, monkeypatch):
+        monkeypatch.setattr(finsec.batch, "Filing", _StubFiling)
+        batch = finsec.FilingBatch(["0000000001", "0000000002", "bad", "0000000003"])
+        df = batch.latest_13f_filings()
+        assert list(df.index.get_level_values("CIK")) == ["0000000001", "0000000003"]
+        assert df.loc["0000000003", "Holding value"].iloc[0] == 3
+        assert set(batch.errors) == {"0000000002", "bad"}
@@ -0,0 +1,83 @@
+"""
+Tests for loading SEC Form 13F bulk data sets
+"""
+
+import zipfile
+import finsec
+
+_TABLES_ = {
+    "SUBMISSION.tsv": [
+        ["ACCESSION_NUMBER", "FILING_DATE", "SUBMISSIONTYPE", "CIK", "PERIODOFREPORT"],
+        ["0000950123-23-000001", "14-FEB-2023", "13F-HR", "1067983", "31-DEC-2022"],
+        ["0000950123-23-000002", "15-MAR-2023", "13F-HR/A", "1067983", "31-DEC-2022"],
+        ["0000950123-23-000003", "14-FEB-2023", "13F-NT", "1234567", "31-DEC-2022"],
+    ],
+    "COVERPAGE.tsv": [
+        ["ACCESSION_NUMBER", "AMENDMENTTYPE", "FILINGMANAGER_NAME", "FILINGMANAGER_STREET1", "FILINGMANAGER_CITY", "FILINGMANAGER_STATEORCOUNTRY", "FILINGMANAGER_ZIPCODE"],
+        ["0000950123-23-000001", "", "Berkshire Hathaway Inc", "3555 Farnam Street", "Omaha", "NE", "68131"],
+        ["0000950123-23-000002", "NEW HOLDINGS", "Berkshire Hathaway Inc", "3555 Farnam Street", "Omaha", "NE", "68131"],
+    ],
+    "SUMMARYPAGE.tsv": [
+        ["ACCESSION_NUMBER", "OTHERINCLUDEDMANAGERSCOUNT", "TABLEENTRYTOTAL", "TABLEVALUETOTAL", "ISCONFIDENTIALOMITTED"],
+        ["0000950123-23-000001", "14", "2", "3000", "N"],
+        ["0000950123-23-000002", "14", "1", "500", "N"],
+    ],
+    "SIGNATURE.tsv": [
+        ["ACCESSION_NUMBER", "NAME", "TITLE", "PHONE", "SIGNATURE", "CITY", "STATEORCOUNTRY", "SIGNATUREDATE"],
+        ["0000950123-23-000001", "Marc D. Hamburg", "Senior Vice President", "402-346-1400", "/s/ Marc D. Hamburg", "Omaha", "NE", "14-FEB-2023"],
+        ["0000950123-23-000002", "Marc D. Hamburg", "Senior Vice President", "402-346-1400", "/s/ Marc D. Hamburg", "Omaha", "NE", "15-MAR-2023"],
+    ],
+    "INFOTABLE.tsv": [
+        ["ACCESSION_NUMBER", "INFOTABLE_SK", "NAMEOFISSUER", "TITLEOFCLASS", "CUSIP", "FIGI", "VALUE", "SSHPRNAMT", "SSHPRNAMTTYPE", "PUTCALL",
+         "INVESTMENTDISCRETION", "OTHERMANAGER", "VOTING_AUTH_SOLE", "VOTING_AUTH_SHARED", "VOTING_AUTH_NONE"],
+        ["0000950123-23-000001", "1", "APPLE INC", "COM", "037833100", "", "2000", "20", "SH", "", "DFND", "4,8,11", "20", "0", "0"],
+        ["0000950123-23-000001", "2", "APPLE INC", "COM", "037833100", "", "1000", "10", "SH", "", "DFND", "4,10", "10", "0", "0"],
+        ["0000950123-23-000002", "3", "ALLY FINL INC", "COM", "02005N100", "", "500", "5", "SH", "", "DFND", "", "5", "0", "0"],
+    ],
+}
+
+
+class Test:
+    def test_load(self, tmp_path):
+        path = str(tmp_path / "2023q1_form13f.zip")
+        with zipfile.ZipFile(path, "w") as archive:
+            for name, rows in _TABLES_.items():
+                archive.writestr("2023q1_form13f/" + name, "\n".join("\t".join(row) for row in rows) + "\n")
+
+        stores = finsec.BulkDataset(path, chunksize=1).load()
+        assert list(stores) == ["0001067983"]
+        filing = stores["0001067983"]["Q4-2022"]
+        cover_page = filing["Cover Page"]
+        assert cover_page["filing_manager"] == "Berkshire Hathaway Inc"
+        assert cover_page["period_of_report"] == "12-31-2022"
+        assert cover_page["portfolio_value"] == 3500 and cover_page["filing_amended"]   # Filed after 2023-01-03, nearest dollar.
+        assert filing["Holdings Table"]["Other manager"].tolist() == ["4,8,11", "4,10", "N/A"]
+        assert filing["Simplified Holdings Table"]["Share or principal amount count"].tolist() == [30, 5]
+
+    def test_iter_filings_single_pass(self, tmp_path):
+        tables = {name: [list(row) for row in rows] for name, rows in _TABLES_.items()}
+        for name, rows in tables.items():     # A second manager, listed after the first.
+            rows.append([x.replace("0000950123-23-000001", "0000950123-23-000004") for x in rows[1]])
+        tables["SUBMISSION.tsv"][-1][3] = "1649339"
+        path = str(tmp_path / "2023q1_form13f.zip")
+        with zipfile.ZipFile(path, "w") as archive:
+            for name, rows in tables.items():
+                archive.writestr("2023q1_form13f/" + name, "\n".join("\t".join(row) for row in rows) + "\n")
+
+        dataset = finsec.BulkDataset(path, chunksize=1)
+        read = []
+        iter_table = dataset._iter_table
+        def _iter_table(table, *args, **kwargs):
+            for chunk in iter_table(table, *args, **kwargs):
+                if table == "INFOTABLE":
+                    read.append(chunk["ACCESSION_NUMBER"].iloc[0])
+                yield chunk
+        dataset._iter_table = _iter_table
+
+        filings = dataset.iter_filings()
+        cik, qtr_year, cover_page, holdings_table, simplified_holdings_table = next(filings)
+        assert (cik, qtr_year, len(holdings_table)) == ("0001067983", "Q4-2022", 3)
+        assert "0000950123-23-000004" not in read[:-1]    # Yielded once the reader moved past the first manager's rows.
+        cik, qtr_year, cover_page, holdings_table, simplified_holdings_table = next(filings)
+        assert (cik, qtr_year, len(holdings_table)) == ("0001649339", "Q4-2022", 1)
+        assert read == ["0000950123-23-000001", "0000950123-23-000001", "0000950123-23-000002", "0000950123-23-000004"]     # A single pass.
@@ -0,0 +1,87 @@
+"""
+Tests for the on-disk EDGAR document cache
+"""
+
+import pandas as pd
+import finsec
+
+_INDEX_URL_ = "https://www.sec.gov/Archives/edgar/data/1067983/000095012323005270/0000950123-23-005270-index.htm"
+_LISTING_URL_ = "https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&CIK=0001067983&type=13F-HR&count=100"
+
+
+class _CountingTransport:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, headers=None):
+        self.calls += 1
+        return type("Response", (), {"content": url.encode()})()
+
+
+class Test:
+    def test_cache_hit(self, tmp_path):
+        transport = _CountingTransport()
+        filing = finsec.Filing("0001067983", transport=transport, cache=finsec.DocumentCache(str(tmp_path)))
+        assert filing._fetch(_INDEX_URL_) == _INDEX_URL_.encode()
+        assert filing._fetch(_INDEX_URL_) == _INDEX_URL_.encode()
+        assert transport.calls == 1
+        assert filing._cache.accession_keys("0000950123-23-005270") == [_INDEX_URL_]
+
+    def test_listing_ttl(self, tmp_path):
+        transport = _CountingTransport()
+        filing = finsec.Filing("0001067983", transport=transport, cache=finsec.DocumentCache(str(tmp_path)))
+        filing._fetch(_LISTING_URL_, ttl=0)
+        filing._fetch(_LISTING_URL_, ttl=0)
+        assert transport.calls == 2
+
+    def test_offline(self, tmp_path):
+        finsec.DocumentCache(str(tmp_path)).put(_LISTING_URL_, b"listing")
+        filing = finsec.Filing("0001067983", transport=_CountingTransport(), cache=finsec.DocumentCache(str(tmp_path), offline=True))
+        assert filing._fetch(_LISTING_URL_, ttl=0) == b"listing"
+        try:
+            filing._fetch(_INDEX_URL_)
+            assert False
+        except finsec.CacheMissError:
+            pass
+
+    def test_lru_eviction(self, tmp_path):
+        cache = finsec.DocumentCache(str(tmp_path), max_bytes=10)
+        cache.put("a", b"123456")
+        cache.put("b", b"abcdef")
+        assert cache.get("a") is None
+        assert cache.get("b") == b"abcdef"
+        assert cache.size() == 6
+
+    def test_replaced_document_removed(self, tmp_path):
+        import os
+        cache = finsec.DocumentCache(str(tmp_path))
+        cache.put("shared", b"listing 0")
+        for i in range(50):
+            cache.put(_LISTING_URL_, "listing {}".format(i).encode())
+        objects = [name for _, _, names in os.walk(os.path.join(str(tmp_path), "objects")) for name in names]
+        assert len(objects) == 2    # The latest listing body, and the first one still referenced by 'shared'.
+        assert cache.size() == sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(os.path.join(str(tmp_path), "objects")) for name in names)
+
+    def test_amendment_period_of_report(self, tmp_path):
+        class _IndexTransport(_CountingTransport):
+            def get(self, url, headers=None):
+                self.calls += 1
+                period = "2022-06-30" if "0001" in url else "2022-09-30"
+                body = '<div class="infoHead">Period of Report</div><div class="info">{}</div>'.format(period)
+                return type("Response", (), {"content": body.encode()})()
+
+        amendments = pd.DataFrame({"url": ["/Archives/edgar/data/1/0001-index.htm", "/Archives/edgar/data/1/0002-index.htm"]})
+        transport = _IndexTransport()
+        filing = finsec.Filing("0001067983", transport=transport, cache=finsec.DocumentCache(str(tmp_path)))
+        filing._13f_amendment_filings = amendments.copy()
+        filing._13f_amendment_filings_period_of_filings()
+        filing._13f_amendment_filings_period_of_filings()
+        assert list(filing._13f_amendment_filings['Period of Report Quarter Year']) == ["Q2-2022", "Q3-2022"]
+        assert transport.calls == 2
+
+        # A new instance (or process) picks the periods up from the persistent index.
+        filing = finsec.Filing("0001067983", transport=transport, cache=finsec.DocumentCache(str(tmp_path), offline=True))
+        filing._13f_amendment_filings = amendments.copy()
+        filing._13f_amendment_filings_period_of_filings()
+        assert list(filing._13f_amendment_filings['Period of Report']) == ["2022-06-30", "2022-09-30"]
+        assert transport.calls == 2
@@ -0,0 +1,36 @@
+"""
+Tests for quarter over quarter position changes
+"""
+
+import pandas as pd
+import pytest
+from finsec.changes import compare_holdings
+
+
+def _table(rows):
+    return pd.DataFrame(rows, columns=['Name of issuer', 'Title of class', 'CUSIP', 'Share or principal type', 'Holding value', 'Share or principal amount count'])
+
+
+class Test:
+    def setup_class(self):
+        previous = _table([
+            ["ACTIVISION BLIZZARD INC", "COM", "00507V109", "SH", 4470946000, 60141866],
+            ["ALLY FINL INC", "COM", "02005N100", "SH", 834901000, 30000000],
+            ["AMAZON COM INC", "COM", "023135106", "SH", 1205258000, 10666000],
+        ])
+        current = _table([
+            ["ACTIVISION BLIZZARD INC", "COM", "00507V109", "SH", 5000000000, 65000000],
+            ["ALLY FINL INC", "COM", "02005N100", "SH", 500000000, 20000000],
+            ["APPLE INC", "COM", "037833100", "SH", 1000000, 5000],
+            ["APPLE INC", "COM", "037833100", "SH", 2000000, 10000],     # Appended by a 'NEW HOLDINGS' amendment.
+        ])
+        self.changes = compare_holdings(previous, current).set_index('CUSIP')
+
+    def test_change_types(self):
+        assert self.changes['Change type'].to_dict() == {"00507V109": "Add", "02005N100": "Trim", "023135106": "Exit", "037833100": "New"}
+
+    def test_deltas(self):
+        assert self.changes.loc["00507V109", "Share change"] == 65000000 - 60141866
+        assert self.changes.loc["023135106", "Value change"] == -1205258000
+        assert self.changes.loc["037833100", "Share or principal amount count"] == 15000
+        assert self.changes.loc["02005N100", "Share change (%)"] == pytest.approx(-100 / 3)
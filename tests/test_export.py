@@ -0,0 +1,41 @@
+"""
+Tests for the streaming Excel, CSV and Parquet exports
+"""
+
+import os
+import pandas as pd
+import pytest
+import finsec
+from finsec.export import write_csv, write_excel, write_parquet
+
+
+class Test:
+    def setup_class(self):
+        table = pd.DataFrame({"Name of issuer": ["ACTIVISION BLIZZARD INC", "AMAZON COM INC"], "CUSIP": ["00507V109", "023135106"],
+                              "Put or call": [None, None], "Holding value": [4470946000, 1205258000]})
+        cover_page = {"filing_manager": "Berkshire Hathaway Inc", "portfolio_value": 5676204000, "filing_amended": False}
+        self.store = finsec.FilingStore({qtr_year: {"Cover Page": cover_page, "Holdings Table": table, "Simplified Holdings Table": table.iloc[:1]}
+                                         for qtr_year in ("Q1-2022", "Q2-2022")})
+
+    def test_excel_matches_pandas(self, tmp_path):
+        streamed = write_excel(self.store, str(tmp_path / "streamed.xlsx"), simplified=False, inc_cover_page_tabs=True)
+        with pd.ExcelWriter(str(tmp_path / "pandas.xlsx")) as writer:
+            for qtr_year, record in self.store.items():
+                pd.DataFrame.from_dict(record["Cover Page"], orient="index").to_excel(writer, sheet_name="{}_cover_pg".format(qtr_year))
+                record["Holdings Table"].to_excel(writer, sheet_name="{}_holdings".format(qtr_year))
+        expected = pd.read_excel(str(tmp_path / "pandas.xlsx"), sheet_name=None, header=None)
+        actual = pd.read_excel(streamed, sheet_name=None, header=None)
+        assert list(actual) == ["Q1-2022_cover_pg", "Q1-2022_holdings", "Q2-2022_cover_pg", "Q2-2022_holdings"]
+        for sheet_name in expected:
+            pd.testing.assert_frame_equal(actual[sheet_name], expected[sheet_name])
+
+    def test_csv(self, tmp_path):
+        paths = write_csv({"0001067983": self.store}, str(tmp_path))
+        assert sorted(os.path.relpath(x, str(tmp_path)) for x in paths) == [os.path.join("cik=0001067983", "quarter={}".format(x), "part-0.csv") for x in ("Q1-2022", "Q2-2022")]
+        assert pd.read_csv(paths[0], dtype={"CUSIP": str})["CUSIP"].tolist() == ["00507V109"]
+
+    def test_parquet(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        write_parquet({"0001067983": self.store}, str(tmp_path), simplified=False)
+        df = pd.read_parquet(str(tmp_path))
+        assert len(df) == 4 and set(df["quarter"].astype(str)) == {"Q1-2022", "Q2-2022"}
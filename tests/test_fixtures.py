@@ -0,0 +1,62 @@
+"""
+End to end tests against a local EDGAR fixture server serving a synthetic manager
+"""
+
+import pandas as pd
+import pytest
+import finsec
+
+
+@pytest.mark.usefixtures("edgar")
+class Test:
+    managers = [dict(cik="0000000001", start_qtr_year=(2022, 1), quarters=4, holdings=60)]
+
+    def setup_method(self):
+        self.filing = finsec.Filing("0000000001", transport=self.server.transport())
+
+    def test_latest_13f_filing(self):
+        df = self.filing.latest_13f_filing()
+        assert isinstance(df, pd.DataFrame)
+        assert self.filing.latest_13f_count_holdings == len(df)
+        assert self.filing.latest_13f_filing_cover_page["filing_manager"] == "Synthetic Capital Management LLC"
+        assert "Q4-2022" in self.filing.filings
+
+    def test_get_a_13f_filing_with_amendment(self):
+        cover_page, holdings_table, simplified_holdings_table = self.filing.get_a_13f_filing("Q3-2022")
+        assert cover_page["filing_amended"]
+        assert len(holdings_table) == 60 + 3
+        assert cover_page["portfolio_value"] == holdings_table["Holding value"].sum()
+
+    def test_parser_parity(self):
+        bs4_filing = finsec.Filing("0000000001", parser="bs4", transport=self.server.transport())
+        for lxml_table, bs4_table in zip(self.filing.get_a_13f_filing("Q2-2022"), bs4_filing.get_a_13f_filing("Q2-2022")):
+            if isinstance(lxml_table, pd.DataFrame):
+                pd.testing.assert_frame_equal(lxml_table, bs4_table)
+            else:
+                assert lxml_table == bs4_table
+
+    def test_get_13f_filings(self):
+        filing = finsec.Filing("0000000001", transport=self.server.transport())
+        df = filing.get_13f_filings("Q1-2022", "Q4-2022")
+        assert list(df.index.get_level_values("Quarter").unique()) == ["Q1-2022", "Q2-2022", "Q3-2022", "Q4-2022"]
+
+    def test_txt_fetch_mode(self):
+        index_filing = finsec.Filing("0000000001", transport=self.server.transport())
+        txt_filing = finsec.Filing("0000000001", transport=self.server.transport(), fetch_mode="txt")
+        for filing in (self.written[0][-1], self.written[0][0]):    # Filed in 2022 and 2023 (the rendered primary document is still read for 2023).
+            results = []
+            for each_filing in (index_filing, txt_filing):
+                before = len(self.server.requests)
+                results.append(each_filing._parse_13f_url(filing["url"], filing["filed"].isoformat()))
+                results.append(len(self.server.requests) - before)
+            index_result, index_requests, txt_result, txt_requests = results
+            assert (index_requests, txt_requests) == ((4, 3) if filing["filed"].year == 2023 else (3, 1))
+            assert index_result[0] == txt_result[0]
+            pd.testing.assert_frame_equal(index_result[1], txt_result[1])
+
+    def test_history(self, tmp_path):
+        history = finsec.HoldingsHistory(str(tmp_path))
+        filing = finsec.Filing("0000000001", transport=self.server.transport(), history=history)
+        simplified_holdings_table = filing.get_13f_filing("Q2-2022")[2]
+        cusip = simplified_holdings_table["CUSIP"][0]
+        assert history.cusip_series(cusip).loc["Q2-2022", "Holding value"] == simplified_holdings_table.loc[simplified_holdings_table["CUSIP"] == cusip, "Holding value"].sum()
@@ -0,0 +1,51 @@
+"""
+Tests for the memory mapped holdings history store
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import finsec
+
+
+def _table(rows):
+    return pd.DataFrame(rows, columns=['Name of issuer', 'Title of class', 'CUSIP', 'Share or principal type', 'Holding value', 'Share or principal amount count'])
+
+
+class Test:
+    @pytest.fixture(autouse=True)
+    def _history(self, tmp_path):
+        self.directory = str(tmp_path)
+        self.history = finsec.HoldingsHistory(self.directory)
+        self.history.add("0001067983", "Q2-2022", _table([["APPLE INC", "COM", "037833100", "SH", 300, 30], ["ALLY FINL INC", "COM", "02005N100", "SH", 50, 5],
+                                                          ["APPLE INC", "CALL", "037833100", "SH", 10, 1]]))
+        self.history.add_store("0001649339", {"Q2-2022": {"Simplified Holdings Table": _table([["APPLE INC", "COM", "037833100", "SH", 100, 10]])},
+                                              "Q1-2022": {"Simplified Holdings Table": _table([["APPLE INC", "COM", "037833100", "SH", 200, 20]])},
+                                              "Q3-2022": {"Simplified Holdings Table": _table([])}})
+
+    def test_cusip_series(self):
+        series = self.history.cusip_series("037833100")
+        assert list(series.index) == ["Q1-2022", "Q2-2022"]
+        assert series.loc["Q2-2022"].tolist() == [2, 41, 410]
+        assert len(self.history.cusip_series("037833100", "Q2-2022", "Q4-2022")) == 1
+        assert len(self.history.cusip_holdings("000000000")) == 0
+
+    def test_reopen_is_memory_mapped(self):
+        history = finsec.HoldingsHistory(self.directory)
+        holdings = history.cusip_holdings("02005N100")
+        assert holdings.values.tolist() == [["Q2-2022", "0001067983", 5, 50]]
+        assert all(isinstance(x, np.memmap) for columns in history._columns.values() for x in columns)
+
+    def test_replace_and_vacuum(self):
+        self.history.add("0001067983", "Q2-2022", _table([["APPLE INC", "COM", "037833100", "SH", 1, 1]]))
+        assert len(self.history) == 4
+        assert self.history.cusip_holdings("02005N100").empty
+        assert self.history.vacuum() == 1
+        assert finsec.HoldingsHistory(self.directory).cusip_series("037833100").loc["Q2-2022", "Holding value"] == 101
+
+    def test_open_partitions_bounded(self):
+        history = finsec.HoldingsHistory(self.directory, max_open=2)
+        assert history.cusip_series("037833100").loc["Q2-2022", "Holders"] == 2   # Three partitions read.
+        assert len(history._columns) == 2
+        assert history.cusip_holdings("02005N100").values.tolist() == [["Q2-2022", "0001067983", 5, 50]]
+        assert len(history._columns) == 2
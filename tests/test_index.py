@@ -0,0 +1,38 @@
+"""
+Tests for the cross manager CUSIP index
+"""
+
+import pandas as pd
+import pytest
+import finsec
+
+
+def _table(rows):
+    return pd.DataFrame(rows, columns=['Name of issuer', 'Title of class', 'CUSIP', 'Share or principal type', 'Holding value', 'Share or principal amount count'])
+
+
+class Test:
+    def setup_method(self):
+        self.index = finsec.HoldingsIndex()
+        self.index.add("0001067983", "Q2-2022", _table([["APPLE INC", "COM", "037833100", "SH", 300, 30], ["ALLY FINL INC", "COM", "02005N100", "SH", 50, 5]]))
+        self.index.add("0001649339", "Q2-2022", _table([["APPLE INC", "COM", "037833100", "SH", 100, 10]]))
+        self.index.add("0001067983", "Q1-2022", _table([["APPLE INC", "COM", "037833100", "SH", 200, 20]]))
+
+    def test_holders(self):
+        holders = self.index.holders("037833100")
+        assert list(zip(holders["Quarter"], holders["CIK"])) == [("Q1-2022", "0001067983"), ("Q2-2022", "0001067983"), ("Q2-2022", "0001649339")]
+        assert len(self.index.holders("037833100", "Q1-2022")) == 1
+        assert len(self.index.holders("000000000")) == 0
+
+    def test_top_holders_and_concentration(self):
+        top = self.index.top_holders("037833100", "Q2-2022", n=1)
+        assert list(top["CIK"]) == ["0001067983"]
+        assert top["Share of reported value (%)"][0] == pytest.approx(75)
+        stats = self.index.concentration("037833100", "Q2-2022")
+        assert stats["holders"] == 2 and stats["total_value"] == 400
+        assert stats["hhi"] == pytest.approx(75 ** 2 + 25 ** 2)
+
+    def test_incremental_replace(self):
+        self.index.add("0001649339", "Q2-2022", _table([["APPLE INC", "COM", "037833100", "SH", 900, 90]]))
+        assert self.index.holders("037833100", "Q2-2022")["Holding value"].tolist() == [300, 900]
+        assert len(self.index) == 4
@@ -0,0 +1,114 @@
+"""
+Tests for reading the full 13F filing history from the submissions feed
+"""
+
+import json
+import pandas as pd
+import finsec
+
+_RECENT_ = {
+    "accessionNumber": ["0000950123-24-000003", "0000950123-23-000002", "0000950123-23-000001", "0000950123-23-000009"],
+    "filingDate": ["2024-02-14", "2023-11-14", "2023-08-14", "2023-08-01"],
+    "reportDate": ["2023-12-31", "2023-09-30", "2023-06-30", "2023-06-30"],
+    "form": ["13F-HR", "13F-HR/A", "13F-HR", "SC 13G"],
+}
+_OLDER_ = {
+    "accessionNumber": ["0000950123-13-000001"],
+    "filingDate": ["2013-05-15"],
+    "reportDate": ["2013-03-31"],
+    "form": ["13F-HR"],
+}
+
+
+class _SubmissionsTransport:
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, headers=None):
+        self.urls.append(url)
+        if url.endswith("CIK0001067983.json"):
+            body = {"filings": {"recent": _RECENT_, "files": [{"name": "CIK0001067983-submissions-001.json"}]}}
+        else:
+            body = _OLDER_
+        return type("Response", (), {"content": json.dumps(body).encode()})()
+
+
+class Test:
+    def setup_class(self):
+        self.transport = _SubmissionsTransport()
+        self.filing = finsec.Filing("0001067983", transport=self.transport)
+        self.filing._get_all_13f_filings_url()
+
+    def test_full_listing(self):
+        assert list(self.filing._13f_filings["Filing Date"]) == ["2024-02-14", "2023-08-14", "2013-05-15"]
+        assert self.filing._13f_filings["url"][2] == "/Archives/edgar/data/1067983/000095012313000001/0000950123-13-000001-index.htm"
+        assert len(self.transport.urls) == 2
+
+    def test_amendment_periods_from_feed(self):
+        amendments = self.filing._13f_amendment_filings_period_of_filings()
+        assert list(amendments["Period of Report Quarter Year"]) == ["Q3-2023"]
+        assert len(self.transport.urls) == 2
+
+    def test_get_13f_filings(self, monkeypatch):
+        def _get_13f_filing(qtr_year, amend_filing=True):
+            return {}, None, pd.DataFrame({"CUSIP": ["00507V109"], "Quarter": [qtr_year]})
+        monkeypatch.setattr(self.filing, "get_13f_filing", _get_13f_filing)
+        df = self.filing.get_13f_filings("Q1-2013", "Q2-2023")
+        assert list(df.index.get_level_values("Quarter")) == ["Q1-2013", "Q2-2023"]
+
+    def test_get_13f_filings_skips_failed_quarters(self, monkeypatch):
+        def _get_13f_filing(qtr_year, amend_filing=True):
+            if qtr_year == "Q1-2013":
+                raise Exception("Could not locate the primary document")
+            return {}, None, pd.DataFrame({"CUSIP": ["00507V109"], "Quarter": [qtr_year]})
+        monkeypatch.setattr(self.filing, "get_13f_filing", _get_13f_filing)
+        df = self.filing.get_13f_filings("Q1-2013", "Q4-2023")
+        assert list(df.index.get_level_values("Quarter")) == ["Q2-2023", "Q4-2023"]
+        assert list(self.filing.errors) == ["Q1-2013"]
+
+    def test_quarter_index(self):
+        index = self.filing._13f_index()
+        assert index["Q4-2023"] == ("/Archives/edgar/data/1067983/000095012324000003/0000950123-24-000003-index.htm", "2024-02-14")
+        assert list(index) == ["Q1-2013", "Q2-2023", "Q4-2023"]
+        assert self.filing._latest_13f_qtr_year == "Q4-2023"
+        assert self.filing._13f_index() is index     # Built once per listing.
+        assert list(self.filing._13f_amendment_chains_index()) == ["Q3-2023"]
+
+    def test_latest_13f_filing_is_most_recently_filed(self):
+        filing = finsec.Filing("0000000003", transport=self.transport)
+        filing._13f_filings = pd.DataFrame({"Filings": ["13F-HR", "13F-HR"], "Filing Date": ["2024-02-14", "2024-01-20"], "url": ["/feb", "/jan-late-q3"]})
+        filing._13f_amendment_filings = pd.DataFrame()
+        parsed = []
+        cover_page = {"period_of_report": "12-31-2023", "portfolio_value": 1, "count_holdings": 0}
+        filing._parse_13f_url = lambda url, date: parsed.append(url) or (cover_page, pd.DataFrame(), pd.DataFrame())
+        filing.get_latest_13f_filing()
+        assert parsed == ["/feb"]
+        assert filing.filings["Q4-2023"]["Latest 13F"]
+
+    def test_latest_13f_record_from_store(self):
+        transport = _SubmissionsTransport()
+        filing = finsec.Filing("0001067983", transport=transport)
+        filing.filings["Q4-2023"] = {"Cover Page": {"filing_manager": "Stored"}, "Fund Value": 10, "Simplified Holdings Count": 2, "Latest 13F": True}
+        assert filing.get_latest_13f_filing_cover_page() == {"filing_manager": "Stored"}
+        assert filing.get_latest_13f_value() == 10
+        assert transport.urls == []
+
+    def test_late_report_keyed_on_period_of_report(self):
+        recent = {"accessionNumber": ["0000950123-24-000002", "0000950123-24-000001"], "filingDate": ["2024-02-14", "2024-01-20"],
+                  "reportDate": ["2023-12-31", "2023-09-30"], "form": ["13F-HR", "13F-HR"]}
+        transport = type("Transport", (), {"get": lambda self, url, headers=None: type("Response", (), {"content": json.dumps({"filings": {"recent": recent, "files": []}}).encode()})()})()
+        filing = finsec.Filing("0000000003", transport=transport)
+        filing._get_all_13f_filings_url()
+        index = filing._13f_index()
+        assert index["Q3-2023"][1] == "2024-01-20" and index["Q4-2023"][1] == "2024-02-14"
+        assert filing._latest_13f_qtr_year == "Q4-2023"
+
+        parsed = []
+        def _parse_13f_url(url, date):
+            parsed.append(date)
+            return {"period_of_report": "N/A", "portfolio_value": 1, "count_holdings": 0}, pd.DataFrame(), pd.DataFrame()
+        filing._parse_13f_url = _parse_13f_url
+        filing.get_13f_filing("Q4-2023")
+        filing.get_13f_filing("Q3-2023")
+        assert parsed == ["2024-02-14", "2024-01-20"]
+        assert filing.filings["Q4-2023"]["Latest 13F"] and not filing.filings["Q3-2023"]["Latest 13F"]
@@ -0,0 +1,43 @@
+"""
+Tests for the instrumentation hooks and metrics listeners
+"""
+
+import pytest
+import finsec
+from finsec import metrics
+
+
+@pytest.mark.usefixtures("edgar")
+class Test:
+    managers = [dict(cik="0000000001", start_qtr_year=(2022, 1), quarters=2, holdings=20)]
+
+    def test_no_listeners(self):
+        assert not metrics.enabled()
+        assert metrics.stage("parse_info_table") is metrics._NULL_STAGE_
+
+    def test_collector(self):
+        collector = finsec.add_listener(finsec.MetricsCollector())
+        try:
+            filing = finsec.Filing("0000000001", transport=self.server.transport(), cache=finsec.DocumentCache(self.directory + "/cache"))
+            filing.get_a_13f_filing("Q1-2022")
+        finally:
+            finsec.remove_listener(collector)
+        assert collector.requests[200] > 0
+        assert collector.cache_misses == collector.requests[200]
+        assert collector.stage_counts["parse_info_table"] >= 1
+        assert collector.stage_counts["parse_listing"] == 1
+
+        text = collector.to_prometheus()
+        assert 'finsec_http_requests_total{{status="200"}} {}'.format(collector.requests[200]) in text
+        assert 'finsec_stage_runs_total{stage="parse_info_table"}' in text
+
+    def test_log_listener(self, caplog):
+        import json, logging
+        listener = finsec.add_listener(finsec.LogListener())
+        try:
+            with caplog.at_level(logging.DEBUG, logger="finsec.metrics"), metrics.stage("example", rows=1):
+                pass
+        finally:
+            finsec.remove_listener(listener)
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record["event"] == "stage" and record["stage"] == "example" and record["rows"] == 1
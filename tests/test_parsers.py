@@ -0,0 +1,77 @@
+"""
+Tests for the 13F information table parser engines
+"""
+
+import pandas as pd
+import pickle
+import subprocess
+import sys
+from finsec.parsers import Holdings, parse_holdings, parse_info_table, simplify_holdings_table, split_submission_text
+
+_INFO_TABLE_ = b"""<?xml version="1.0" encoding="UTF-8"?>
+<ns1:informationTable xmlns:ns1="http://www.sec.gov/edgar/document/thirteenf/informationtable">
+  <ns1:infoTable>
+    <ns1:nameOfIssuer>ACTIVISION BLIZZARD INC</ns1:nameOfIssuer>
+    <ns1:titleOfClass>COM</ns1:titleOfClass>
+    <ns1:cusip>00507V109</ns1:cusip>
+    <ns1:value>1906458</ns1:value>
+    <ns1:shrsOrPrnAmt><ns1:sshPrnamt>25645116</ns1:sshPrnamt><ns1:sshPrnamtType>SH</ns1:sshPrnamtType></ns1:shrsOrPrnAmt>
+    <ns1:investmentDiscretion>DFND</ns1:investmentDiscretion>
+    <ns1:otherManager>4,8,11</ns1:otherManager>
+    <ns1:votingAuthority><ns1:Sole>25645116</ns1:Sole><ns1:Shared>0</ns1:Shared><ns1:None>0</ns1:None></ns1:votingAuthority>
+  </ns1:infoTable>
+  <ns1:infoTable>
+    <ns1:nameOfIssuer>ACTIVISION BLIZZARD INC</ns1:nameOfIssuer>
+    <ns1:titleOfClass>COM</ns1:titleOfClass>
+    <ns1:cusip>00507V109</ns1:cusip>
+    <ns1:value>85095</ns1:value>
+    <ns1:shrsOrPrnAmt><ns1:sshPrnamt>1144672</ns1:sshPrnamt><ns1:sshPrnamtType>SH</ns1:sshPrnamtType></ns1:shrsOrPrnAmt>
+    <ns1:investmentDiscretion>DFND</ns1:investmentDiscretion>
+    <ns1:otherManager>4,10</ns1:otherManager>
+    <ns1:votingAuthority><ns1:Sole>1144672</ns1:Sole><ns1:Shared>0</ns1:Shared><ns1:None>0</ns1:None></ns1:votingAuthority>
+  </ns1:infoTable>
+  <ns1:infoTable>
+    <ns1:nameOfIssuer>ALLY FINL INC</ns1:nameOfIssuer>
+    <ns1:titleOfClass>COM</ns1:titleOfClass>
+    <ns1:cusip>02005N100</ns1:cusip>
+    <ns1:value>834901</ns1:value>
+    <ns1:shrsOrPrnAmt><ns1:sshPrnamt>30000000</ns1:sshPrnamt><ns1:sshPrnamtType>SH</ns1:sshPrnamtType></ns1:shrsOrPrnAmt>
+    <ns1:investmentDiscretion>DFND</ns1:investmentDiscretion>
+    <ns1:votingAuthority><ns1:Sole>30000000</ns1:Sole><ns1:Shared>0</ns1:Shared><ns1:None>0</ns1:None></ns1:votingAuthority>
+  </ns1:infoTable>
+</ns1:informationTable>
+"""
+
+
+class Test:
+    def setup_class(self):
+        self.bs4_table = parse_info_table(_INFO_TABLE_, 1000, parser='bs4')
+        self.lxml_table = parse_info_table(_INFO_TABLE_, 1000, parser='lxml')
+
+    def test_holdings_table_parity(self):
+        pd.testing.assert_frame_equal(self.lxml_table, self.bs4_table)
+        assert self.lxml_table['Holding value'][0] == 1906458000
+        assert self.lxml_table['Other manager'][2] == "N/A"
+
+    def test_simplified_holdings_table_parity(self):
+        lxml_simplified = simplify_holdings_table(self.lxml_table)
+        pd.testing.assert_frame_equal(lxml_simplified, simplify_holdings_table(self.bs4_table))
+        assert len(lxml_simplified) == 2
+        assert lxml_simplified['Share or principal amount count'][0] == 25645116 + 1144672
+
+    def test_split_submission_text(self):
+        submission = b"<SEC-DOCUMENT>0000000001-22-000001.txt : 20220815\n<SEC-HEADER>\n</SEC-HEADER>\n<DOCUMENT>\n<TYPE>13F-HR\n<SEQUENCE>1\n<FILENAME>primary_doc.xml\n<TEXT>\n<XML>\n<edgarSubmission/>\n</XML>\n</TEXT>\n</DOCUMENT>\n<DOCUMENT>\n<TYPE>INFORMATION TABLE\n<SEQUENCE>2\n<FILENAME>infotable.xml\n<TEXT>\n<XML>\n" + _INFO_TABLE_ + b"\n</XML>\n</TEXT>\n</DOCUMENT>\n</SEC-DOCUMENT>\n"
+        documents = split_submission_text(submission)
+        assert [(doc_type, filename) for doc_type, filename, _ in documents] == [("13F-HR", "primary_doc.xml"), ("INFORMATION TABLE", "infotable.xml")]
+        assert documents[0][2] == b"<edgarSubmission/>"
+        pd.testing.assert_frame_equal(parse_info_table(documents[1][2], 1000), self.lxml_table)
+
+    def test_holdings_container(self):
+        holdings = parse_holdings(_INFO_TABLE_, 1000)
+        assert isinstance(holdings, Holdings) and len(holdings) == 3
+        assert holdings.int_columns["Holding value"][0] == 1906458000
+        pd.testing.assert_frame_equal(pickle.loads(pickle.dumps(holdings)).to_pandas(), self.lxml_table)
+
+    def test_lazy_imports(self):
+        code = "import sys, finsec; from finsec import Filing; from finsec.parsers import parse_holdings; print(sorted(m for m in ('pandas', 'bs4', 'openpyxl', 'numpy', 'pdb') if m in sys.modules))"
+        assert subprocess.check_output([sys.executable, "-c", code], text=True).strip() == "[]"
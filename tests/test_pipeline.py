@@ -0,0 +1,49 @@
+"""
+Tests for the pipelined (fetch threads + parse processes) backfill
+"""
+
+import pandas as pd
+import pytest
+import finsec
+
+
+@pytest.mark.usefixtures("edgar")
+class Test:
+    managers = [dict(cik=cik, start_qtr_year=(2022, 1), quarters=4, holdings=40, seed=int(cik)) for cik in ("0000000001", "0000000002")]
+
+    def test_run(self):
+        progress = []
+        pipeline = finsec.FilingPipeline(["0000000001", "0000000002", "0000000003"], parse_workers=2, max_pending=1,
+                                         progress=lambda *args: progress.append(args), transport=self.server.transport())
+        df = pipeline.run("Q1-2022", "Q4-2022")
+        assert list(df.index.get_level_values("CIK").unique()) == ["0000000001", "0000000002"]
+        assert list(df.loc["0000000001"].index.get_level_values("Quarter").unique()) == ["Q1-2022", "Q2-2022", "Q3-2022", "Q4-2022"]
+        assert len(progress) == 8 and progress[-1][2:] == (8, 8)
+        assert set(pipeline.errors) == {"0000000003"}   # No listing for this CIK.
+
+        filing = finsec.Filing("0000000001", transport=self.server.transport())
+        for qtr_year in ("Q3-2022", "Q4-2022"):    # Amended, and the latest filing.
+            cover_page, holdings_table, simplified_holdings_table = filing.get_13f_filing(qtr_year)
+            record = pipeline.filings["0000000001"].filings[qtr_year]
+            assert record["Cover Page"] == cover_page
+            assert record["Latest 13F"] == filing.filings[qtr_year]["Latest 13F"]
+            pd.testing.assert_frame_equal(record["Holdings Table"], holdings_table)
+            pd.testing.assert_frame_equal(record["Simplified Holdings Table"], simplified_holdings_table)
+
+    def test_failure_does_not_hang(self):
+        import threading
+
+        def progress(cik, qtr_year, completed, total):
+            raise ValueError("progress failed")
+        pipeline = finsec.FilingPipeline(["0000000001", "0000000002"], parse_workers=1, max_pending=1, progress=progress, transport=self.server.transport())
+        raised = []
+        def _run():
+            try:
+                pipeline.run("Q1-2022", "Q4-2022")
+            except ValueError as e:
+                raised.append(e)
+        thread = threading.Thread(target=_run, daemon=True)
+        thread.start()
+        thread.join(timeout=60)
+        assert not thread.is_alive()     # Fetch threads blocked on the full queue are released.
+        assert len(raised) == 1
@@ -0,0 +1,30 @@
+"""
+Tests for the in-memory filing store
+"""
+
+import pandas as pd
+import finsec
+
+
+class Test:
+    def setup_class(self):
+        self.table = pd.DataFrame({"CUSIP": ["00507V109", "023135106"], "Holding value": [4470946000, 1205258000]})
+        self.store = finsec.FilingStore({"Q2-2022": {"Cover Page": {"filing_manager": "Berkshire Hathaway Inc"}, "Holdings Table": self.table,
+                                                     "Simplified Holdings Table": self.table, "Latest 13F": True}})
+
+    def test_save_load(self, tmp_path):
+        path = str(tmp_path / "filings.pkl")
+        self.store.save(path)
+        loaded = finsec.FilingStore.load(path)
+        assert isinstance(loaded, finsec.FilingStore)
+        pd.testing.assert_frame_equal(loaded["Q2-2022"]["Holdings Table"], self.table)
+        assert loaded["Q2-2022"]["Holdings Table"]["CUSIP"][0] == "00507V109"
+
+    def test_cache_hit_returns_stored_tables(self):
+        filing = finsec.Filing("0001067983", transport=object())     # Any request would fail.
+        filing.filings = self.store
+        cover_page, holdings_table, simplified_holdings_table = filing.get_13f_filing("Q2-2022")
+        assert holdings_table is self.table
+
+    def test_to_json_dict(self):
+        assert isinstance(self.store.to_json_dict()["Q2-2022"]["Holdings Table"], str)
@@ -0,0 +1,52 @@
+"""
+Tests for the pooled, rate limited HTTP transport
+"""
+
+import time
+import requests
+from finsec.transport import RateLimiter, Transport
+
+
+class _FakeResponse:
+    def __init__(self, status_code, content=b""):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(str(self.status_code))
+
+
+class _FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, url, headers=None, timeout=None):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+class Test:
+    def test_rate_limiter(self):
+        limiter = RateLimiter(rate=50)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        assert time.monotonic() - start >= 0.09
+
+    def test_retry_on_throttle(self):
+        transport = Transport(rate_limiter=RateLimiter(rate=1000), backoff_factor=0)
+        transport.session = _FakeSession([_FakeResponse(429), _FakeResponse(503), _FakeResponse(200, b"ok")])
+        assert transport.get("https://www.sec.gov").content == b"ok"
+        assert transport.session.calls == 3
+
+    def test_retries_exhausted(self):
+        transport = Transport(rate_limiter=RateLimiter(rate=1000), max_retries=1, backoff_factor=0)
+        transport.session = _FakeSession([_FakeResponse(500), _FakeResponse(500)])
+        try:
+            transport.get("https://www.sec.gov")
+            assert False
+        except requests.HTTPError:
+            assert transport.session.calls == 2
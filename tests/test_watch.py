@@ -0,0 +1,65 @@
+"""
+Tests of the incremental watch mode against a local EDGAR fixture server, rewriting the synthetic manager between polls
+"""
+
+import json
+import pandas as pd
+import pytest
+import finsec
+from finsec.fixtures import write_synthetic_manager
+
+
+@pytest.mark.usefixtures("edgar")
+class Test:
+    managers = [dict(cik="0000000001", start_qtr_year=(2022, 1), quarters=4, holdings=60, amendments=False),
+                dict(cik="0000000002", start_qtr_year=(2022, 1), quarters=4, holdings=60, amendments=True)]
+
+    def test_watch(self, tmp_path):
+        events = []
+        state_path = str(tmp_path / "state.json")
+        watcher = finsec.FilingWatcher(["0000000001"], callback=events.append, state_path=state_path, transport=self.server.transport())
+        filing = watcher._get_filing("0000000001")
+
+        assert watcher.poll() == []     # First poll records a baseline only.
+        assert watcher.state["0000000001"]["accessions"][0] == filing._13f_filings["Accession Number"][0]
+
+        before = len(self.server.requests)
+        assert watcher.poll() == []     # Unchanged, a single conditional request answered with a 304.
+        assert len(self.server.requests) - before == 1
+
+        # A new quarter is filed.
+        write_synthetic_manager(self.directory, cik="0000000001", start_qtr_year=(2022, 1), quarters=5, holdings=60, amendments=False)
+        filing.get_13f_filing("Q4-2022")
+        new = watcher.poll()
+        assert [(x["form"], x["qtr_year"]) for x in new] == [("13F-HR", "Q1-2023")]
+        assert len(new[0]["holdings_table"]) == 60
+        assert filing.filings["Q1-2023"]["Latest 13F"] and not filing.filings["Q4-2022"]["Latest 13F"]
+        assert events == new
+
+        # An amendment to a stored quarter is merged into that quarter only.
+        write_synthetic_manager(self.directory, cik="0000000001", start_qtr_year=(2022, 1), quarters=5, holdings=60, amendments=True)
+        q1_table = filing.filings["Q1-2023"]["Holdings Table"]
+        amended = watcher.poll()
+        assert [(x["form"], x["qtr_year"]) for x in amended] == [("13F-HR/A", "Q4-2022")]
+        assert filing.filings["Q1-2023"]["Holdings Table"] is q1_table
+        fresh = finsec.Filing("0000000001", transport=self.server.transport()).get_13f_filing("Q4-2022")
+        assert len(amended[0]["holdings_table"]) == 60 + 3
+        assert amended[0]["cover_page"] == fresh[0]
+        pd.testing.assert_frame_equal(filing.filings["Q4-2022"]["Simplified Holdings Table"], fresh[2])
+
+        # A restarted watcher carries on from the saved state.
+        with open(state_path) as f:
+            assert json.load(f) == watcher.state
+        restarted = finsec.FilingWatcher(["0000000001"], state_path=state_path, transport=self.server.transport())
+        assert restarted.poll() == [] and restarted.errors == {}
+
+    def test_original_and_amendment_in_one_poll(self):
+        watcher = finsec.FilingWatcher(["0000000002"], include_existing=True, transport=self.server.transport())
+        events = watcher.poll()
+        assert [x["form"] for x in events] == ["13F-HR", "13F-HR", "13F-HR", "13F-HR/A", "13F-HR"]
+        fresh = finsec.Filing("0000000002", transport=self.server.transport()).get_13f_filing("Q3-2022")
+        stored = watcher.filings["0000000002"].filings["Q3-2022"]
+        assert len(stored["Holdings Table"]) == 60 + 3
+        assert stored["Fund Value"] == fresh[0]["portfolio_value"]
+        pd.testing.assert_frame_equal(stored["Simplified Holdings Table"], fresh[2])
+        assert events[3]["holdings_table"] is stored["Holdings Table"]